@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# benchmark of the output buffer, program writes one character at a time in a loop
+# every run counts the write calls that reach the output and measures the time
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import interpret
+
+# program writes character "a" given number of times
+program = """<?xml version="1.0" encoding="UTF-8"?>
+<program language="IPPcode19">
+    <instruction order="1" opcode="DEFVAR"><arg1 type="var">GF@i</arg1></instruction>
+    <instruction order="2" opcode="MOVE"><arg1 type="var">GF@i</arg1><arg2 type="int">0</arg2></instruction>
+    <instruction order="3" opcode="LABEL"><arg1 type="label">loop</arg1></instruction>
+    <instruction order="4" opcode="WRITE"><arg1 type="string">a</arg1></instruction>
+    <instruction order="5" opcode="ADD"><arg1 type="var">GF@i</arg1><arg2 type="var">GF@i</arg2><arg3 type="int">1</arg3></instruction>
+    <instruction order="6" opcode="JUMPIFNEQ"><arg1 type="label">loop</arg1><arg2 type="var">GF@i</arg2><arg3 type="int">{0}</arg3></instruction>
+</program>
+"""
+
+# counts write calls that would be system calls on a real file
+class CountingStream(io.RawIOBase):
+    # initializes counters
+    def __init__(self):
+        self.calls = 0
+        self.written = 0
+
+    # output can be written
+    def writable(self):
+        return True
+
+    # counts the call and throws the data away
+    def write(self, data):
+        self.calls = self.calls + 1
+        self.written = self.written + len(data)
+        return len(data)
+
+# runs the interpret with given buffer size and returns number of writes, written bytes and time
+def run(source, size, engine):
+    stream = CountingStream()
+    stdout = sys.stdout
+    argv = sys.argv
+    sys.stdout = io.TextIOWrapper(io.BufferedWriter(stream), encoding="utf-8")
+    sys.argv = ["interpret.py", "--source=" + source, "--output-buffer=" + str(size), "--engine=" + engine]
+    start = time.perf_counter()
+    try:
+        interpret.main()
+    except SystemExit:
+        pass
+    finally:
+        elapsed = time.perf_counter() - start
+        sys.stdout = stdout
+        sys.argv = argv
+    return stream.calls, stream.written, elapsed
+
+# prints results for unbuffered and buffered output
+def main():
+    count = 20000
+    if(len(sys.argv) > 1):
+        count = int(sys.argv[1])
+
+    descriptor, source = tempfile.mkstemp(suffix=".xml")
+    with os.fdopen(descriptor, "w") as source_file:
+        source_file.write(program.format(count))
+
+    try:
+        for engine in interpret.engines:
+            for size in [0, 8192]:
+                calls, written, elapsed = run(source, size, engine)
+                sys.stdout.write("engine=%-10s buffer=%-5d writes=%-6d bytes=%-6d time=%.3fs\n" % (engine, size, calls, written, elapsed))
+    finally:
+        os.remove(source)
+
+# calls the main function
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# benchmark of the program cache, compares startup of large program without cache,
+# with empty cache directory (cold) and with the program already cached (warm)
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+interpret = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "interpret.py")
+
+# writes program of given number of instructions that are all carried out once
+def write_program(path, count):
+    with open(path, "w") as source_file:
+        source_file.write('<?xml version="1.0" encoding="UTF-8"?>\n<program language="IPPcode19">\n')
+        source_file.write('<instruction order="1" opcode="DEFVAR"><arg1 type="var">GF@i</arg1></instruction>\n')
+        source_file.write('<instruction order="2" opcode="MOVE"><arg1 type="var">GF@i</arg1><arg2 type="int">0</arg2></instruction>\n')
+        for order in range(3, count + 1):
+            if(order % 2 == 0):
+                source_file.write('<instruction order="%d" opcode="ADD"><arg1 type="var">GF@i</arg1>'
+                                  '<arg2 type="var">GF@i</arg2><arg3 type="int">%d</arg3></instruction>\n' % (order, order))
+            else:
+                source_file.write('<instruction order="%d" opcode="LABEL"><arg1 type="label">l%d</arg1></instruction>\n' % (order, order))
+        source_file.write('</program>\n')
+
+# runs the interpret and returns the time it took
+def run(source, arguments):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, interpret, "--source=" + source] + arguments,
+                   stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+# prints startup times
+def main():
+    count = 50000
+    if(len(sys.argv) > 1):
+        count = int(sys.argv[1])
+    repeat = 5
+
+    directory = tempfile.mkdtemp()
+    try:
+        source = os.path.join(directory, "program.xml")
+        cache = os.path.join(directory, "cache")
+        write_program(source, count)
+
+        plain = min([run(source, []) for i in range(0, repeat)])
+        cold = []
+        for i in range(0, repeat):
+            shutil.rmtree(cache, ignore_errors=True)
+            cold.append(run(source, ["--cache-dir=" + cache]))
+        warm = min([run(source, ["--cache-dir=" + cache]) for i in range(0, repeat)])
+
+        sys.stdout.write("instructions=%d\n" % count)
+        sys.stdout.write("no cache   %.3fs\n" % plain)
+        sys.stdout.write("cold cache %.3fs\n" % min(cold))
+        sys.stdout.write("warm cache %.3fs\n" % warm)
+    finally:
+        shutil.rmtree(directory)
+
+# calls the main function
+if __name__ == '__main__':
+    main()
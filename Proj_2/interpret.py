@@ -1,10 +1,17 @@
 #!/usr/bin/env python3
 
 import sys
+import io
+import gc
 import re
 import xml.etree.ElementTree as ET
 from enum import Enum
 import codecs
+import operator
+import hashlib
+import marshal
+import os
+import tempfile
 
 # arrays of all opcodes divided according to the number of operands
 non_arg = ["CREATEFRAME", "PUSHFRAME", "POPFRAME" , "RETURN", "BREAK"]
@@ -16,6 +23,82 @@ two_arg = ["MOVE", "INT2CHAR", "READ", "STRLEN", "TYPE", "NOT"]
 
 three_arg = ["ADD", "SUB", "MUL", "IDIV", "LT", "GT", "EQ", "AND", "OR", "STRI2INT", "CONCAT", "GETCHAR", "SETCHAR", "JUMPIFEQ", "JUMPIFNEQ"]
 
+# kinds of operands of each opcode, symb is either variable or constant
+operand_kinds = {
+    "DEFVAR" : ["var"], "POPS" : ["var"], "PUSHS" : ["symb"], "WRITE" : ["symb"],
+    "EXIT" : ["symb"], "DPRINT" : ["symb"], "CALL" : ["label"], "LABEL" : ["label"],
+    "JUMP" : ["label"], "JUMPIFEQS" : ["label"], "JUMPIFNEQS" : ["label"],
+    "MOVE" : ["var", "symb"], "INT2CHAR" : ["var", "symb"], "STRLEN" : ["var", "symb"],
+    "TYPE" : ["var", "symb"], "NOT" : ["var", "symb"], "READ" : ["var", "type"],
+    "JUMPIFEQ" : ["label", "symb", "symb"], "JUMPIFNEQ" : ["label", "symb", "symb"],
+}
+for opcode in three_arg:
+    if(opcode not in operand_kinds):
+        operand_kinds[opcode] = ["var", "symb", "symb"]
+for opcode in non_arg:
+    operand_kinds[opcode] = []
+
+# opcodes that always continue with the next instruction and can start a superinstruction
+straight_opcodes = ["MOVE", "ADD", "SUB", "MUL", "IDIV", "AND", "OR", "NOT", "INT2CHAR", "STRI2INT"]
+straight_opcodes = straight_opcodes + ["CONCAT", "STRLEN", "GETCHAR", "SETCHAR", "TYPE", "PUSHS", "POPS", "WRITE"]
+
+# opcodes that store result of comparison into variable
+compare_opcodes = ["LT", "GT", "EQ"]
+
+# types of constants
+constant_types = ["int", "bool", "string", "nil"]
+
+# literal of integer value
+integer_literal = re.compile(r"-?[0-9]+")
+
+# escape sequence of string literal without the backslash
+escape_code = re.compile(r"[0-9]{3}")
+
+# values of type operand
+type_names = ["int", "string", "bool", "nil"]
+
+# opcodes whose first operand is label of jump destination
+jump_opcodes = ["JUMP", "JUMPIFEQ", "JUMPIFNEQ", "JUMPIFEQS", "JUMPIFNEQS", "CALL"]
+
+# opcodes that store into variables or change frames
+store_opcodes = ["MOVE", "DEFVAR", "CREATEFRAME", "PUSHFRAME", "POPFRAME", "POPS", "READ", "TYPE"]
+store_opcodes = store_opcodes + ["ADD", "SUB", "MUL", "IDIV", "LT", "GT", "EQ", "AND", "OR", "NOT"]
+store_opcodes = store_opcodes + ["INT2CHAR", "STRI2INT", "CONCAT", "STRLEN", "GETCHAR", "SETCHAR"]
+
+# available execution engines
+engines = ["table", "closure", "transpile"]
+
+# marks slot of variable that wasn't defined yet
+undefined = object()
+
+# local and temporary frames are lists with slot for every name when the program has at most so many
+# names of local and temporary variables, otherwise they are Frame that takes memory only for defined ones
+list_frame_names = 64
+
+# types that can be compared with relational operators
+comparable_types = (int, bool, str)
+
+# instructions quickened by the table engine, operation and types of operands it can be specialized for
+# CONCAT is left out, its generic handler appends to the string in place
+quick_operations = {
+    "ADD" : (operator.add, [(int, int)]), "SUB" : (operator.sub, [(int, int)]), "MUL" : (operator.mul, [(int, int)]),
+    "LT" : (operator.lt, [(int, int), (bool, bool), (str, str)]), "GT" : (operator.gt, [(int, int), (bool, bool), (str, str)]),
+    "EQ" : (operator.eq, [(int, int), (bool, bool), (str, str)]),
+    "AND" : (operator.and_, [(bool, bool)]), "OR" : (operator.or_, [(bool, bool)]),
+    "GETCHAR" : (None, [(str, int)]), "STRI2INT" : (None, [(str, int)]),
+}
+
+# number of values stack instructions take from the data stack and the change of its depth they make
+stack_effects = {
+    "PUSHS" : (0, 1), "POPS" : (1, -1), "NOTS" : (1, 0), "INT2CHARS" : (1, 0),
+    "ADDS" : (2, -1), "SUBS" : (2, -1), "MULS" : (2, -1), "IDIVS" : (2, -1), "LTS" : (2, -1), "GTS" : (2, -1),
+    "EQS" : (2, -1), "ANDS" : (2, -1), "ORS" : (2, -1), "STRI2INTS" : (2, -1), "JUMPIFEQS" : (2, -2), "JUMPIFNEQS" : (2, -2),
+}
+
+# number of executions with the same types before instruction is specialized, and number of failed
+# guards before specialized instruction goes back to observing types
+warmup = 8
+
 # parses input arguments
 class Arguments:
     # initializes the arguments
@@ -34,7 +117,15 @@ class Arguments:
         self.input = False
         self.stats = False
         self.stats_arg = []
-
+        self.engine = False
+        self.engine_name = "table"
+        self.dump = False
+        self.output = False
+        self.output_size = 8192
+        self.cache = False
+        self.optimize = False
+        self.level = 0
+        self.report = False
 
         # iterate through all arguments
         for arg in arguments:
@@ -56,6 +147,48 @@ class Arguments:
                     sys.exit(10)
                 self.stats = True
                 self.stats_file = self.parse_path(arg)
+            elif("--engine=" in arg):
+                if(self.engine):    # check for multiple input of the same arguments
+                    sys.stderr.write("Same argument was entered twice\n")
+                    sys.exit(10)
+                self.engine = True
+                self.engine_name = self.parse_path(arg)
+                if(self.engine_name not in engines):
+                    sys.stderr.write("Unknown engine\n")
+                    sys.exit(10)
+            elif("--dump-source=" in arg):
+                if(self.dump):      # check for multiple input of the same arguments
+                    sys.stderr.write("Same argument was entered twice\n")
+                    sys.exit(10)
+                self.dump = True
+                self.dump_file = self.parse_path(arg)
+            elif("--output-buffer=" in arg):
+                if(self.output):    # check for multiple input of the same arguments
+                    sys.stderr.write("Same argument was entered twice\n")
+                    sys.exit(10)
+                self.output = True
+                size = self.parse_path(arg)
+                if(not size.isdigit()):
+                    sys.stderr.write("Invalid size of output buffer\n")
+                    sys.exit(10)
+                self.output_size = int(size)
+            elif("--cache-dir=" in arg):
+                if(self.cache):     # check for multiple input of the same arguments
+                    sys.stderr.write("Same argument was entered twice\n")
+                    sys.exit(10)
+                self.cache = True
+                self.cache_dir = self.parse_path(arg)
+            elif(arg in ["-O0", "-O1", "-O2"]):
+                if(self.optimize):  # check for multiple input of the same arguments
+                    sys.stderr.write("Same argument was entered twice\n")
+                    sys.exit(10)
+                self.optimize = True
+                self.level = int(arg[2])
+            elif(arg == "--report-dead-code"):
+                if(self.report):    # check for multiple input of the same arguments
+                    sys.stderr.write("Same argument was entered twice\n")
+                    sys.exit(10)
+                self.report = True
             elif("--insts" == arg or "--vars" == arg):
                 if(arg in self.stats_arg):  # check for multiple input of the same arguments
                     sys.stderr.write("Same argument was entered twice\n")
@@ -71,6 +204,16 @@ class Arguments:
             sys.stderr.write("At least one file is needed\n")
             sys.exit(10)
 
+        # generated source exists only for the transpile engine
+        if(self.dump and self.engine_name != "transpile"):
+            sys.stderr.write("--dump-source requires --engine=transpile\n")
+            sys.exit(10)
+
+        # unreachable code is found by the optimizer
+        if(self.report and self.level == 0):
+            sys.stderr.write("--report-dead-code requires -O1 or -O2\n")
+            sys.exit(10)
+
         # stats were not entered but it's arguments were given
         if(self.stats == False and len(self.stats_arg) != 0):
             sys.stderr.write("File for stats is required\n")
@@ -93,51 +236,131 @@ class Arguments:
         sys.stdout.write("--help : prints help\n")
         sys.stdout.write("--source=file : sets the path to the XML representation of source file\n")
         sys.stdout.write("--input=file : sets path to the file that contains input for interpretation\n")
+        sys.stdout.write("--engine=name : sets the execution engine, table (default), closure or transpile\n")
+        sys.stdout.write("--dump-source=file : writes Python source generated by the transpile engine to file\n")
+        sys.stdout.write("--output-buffer=size : sets size of output buffer in characters, 0 writes out every WRITE\n")
+        sys.stdout.write("--cache-dir=path : keeps loaded programs in given directory and reuses them in later runs\n")
+        sys.stdout.write("-O1 : removes unreachable code, simplifies jumps and removes labels before the program runs, -O2 also folds constants and removes unused variables\n")
+        sys.stdout.write("--report-dead-code : writes out unreachable parts of the program removed by the optimizer\n")
         sys.stdout.write("At least one file must be given\n")
 
+# collects output of the program and writes it out in bigger blocks
+class OutputBuffer:
+    # initializes empty buffer of given size
+    def __init__(self, size):
+        self.size = size
+        self.parts = []
+        self.length = 0
+
+    # adds text to the buffer, buffer is written out once it is full
+    def write(self, text):
+        self.parts.append(text)
+        self.length = self.length + len(text)
+        if(self.length >= self.size):
+            self.flush()
+
+    # writes out everything in the buffer
+    def flush(self):
+        if(len(self.parts) != 0):
+            sys.stdout.write("".join(self.parts))
+            self.parts = []
+            self.length = 0
+        sys.stdout.flush()
+
+# string kept in a variable that CONCAT and SETCHAR change in place, the table engine stores it instead of str
+# it never leaves its variable, every read that copies the value elsewhere gets str
+class StringBuffer:
+    # initializes buffer with characters of given string
+    def __init__(self, string):
+        self.chars = list(string)
+        self.string = string    # the whole string, None when it has changed since it was last joined
+
+    # appends string to the end
+    def append(self, string):
+        self.chars.extend(string)
+        self.string = None
+
+    # replaces character on given index, IndexError for index out of the string
+    def replace(self, index, char):
+        self.chars[index] = char
+        self.string = None
+
+    # gets buffer as str, it is joined only after a change
+    def value(self):
+        if(self.string == None):
+            self.string = "".join(self.chars)
+        return self.string
+
+    # length of the string
+    def __len__(self):
+        return len(self.chars)
+
+    # character on given index
+    def __getitem__(self, index):
+        return self.chars[index]
+
+# values string instructions accept, StringBuffer is read without joining it
+string_types = (str, StringBuffer)
+
+# local or temporary frame of program with many names of local variables, it keeps only variables
+# defined in it, so deep recursion doesn't take memory for names the recursive function never uses
+class Frame(dict):
+    __slots__ = []
+
+    # variable that isn't defined in the frame
+    def __missing__(self, slot):
+        return undefined
+
+# error of the program found while it is decoded, it is reported once the whole XML is read
+class ProgramError(Exception):
+    # exit code and message of the error
+    def __init__(self, code, message):
+        Exception.__init__(self, message)
+        self.code = code
+        self.message = message
+
 # carries out all checks for particular operand
 class Operand:
+    # attributes are fixed, programs keep millions of operands
+    __slots__ = ["type", "frame", "name", "value", "slot", "checked"]
+
     # initializes operand
     def __init__(self, instruction):
         # get current type of operand
         try:
-            self.type = instruction.attrib['type']
+            self.type = sys.intern(instruction.attrib['type'])    # operands share strings that repeat
         except:
-            sys.stderr.write("Missing type attribute\n")
-            sys.exit(52)
+            raise ProgramError(52, "Missing type attribute")
+        self.slot = None    # slot of variable in its frame, assigned when program is linked
+        self.checked = True # existence of variable is checked when it's used, unless the optimizer proved it
 
         # parse arguments
         # type is variable
         if(self.type == "var"):
             try:    # check all arguments for variable
                 if("@" in instruction.text):
-                    self.frame = self.get_frame(instruction.text)
-                    self.name = self.get_name(instruction.text)
+                    self.frame = sys.intern(self.get_frame(instruction.text))
+                    self.name = sys.intern(self.get_name(instruction.text))
                     self.check_name(self.name)
                     self.value = None
                 else:
-                    sys.stderr.write("Missing @ in variable name\n")
-                    sys.exit(52)
+                    raise ProgramError(52, "Missing @ in variable name")
             except:
-                sys.stderr.write("Invalid variable\n")
-                sys.exit(52)
+                raise ProgramError(52, "Invalid variable")
         else:       # everything else
             if(self.type == "string"):
                 if(instruction.text != None):
                     if "#" in instruction.text:
-                        sys.stderr.write("Invalid character\n")
-                        sys.exit(32)
+                        raise ProgramError(32, "Invalid character")
             if(self.type == "type" or self.type == "bool" or self.type == "nil" or self.type == "int" or self.type == "string" or self.type == "label"):
                 try:
                     self.value = instruction.text
                     self.frame = None
                     self.name = None
                 except:
-                    sys.stderr.write("Invalid instruction operand\n")
-                    sys.exit(52)
+                    raise ProgramError(52, "Invalid instruction operand")
             else:
-                sys.stderr.write("Invalid XML format\n")
-                sys.exit(32)
+                raise ProgramError(32, "Invalid XML format")
 
     # gets the frame
     def get_frame(self, name):  # TODO - try excep - both
@@ -159,17 +382,139 @@ class Operand:
                 continue
             elif(char.isdigit()):
                 if(i == 0):
-                    sys.stderr.write("Name cannot start with number\n")
-                    sys.exit(32)
+                    raise ProgramError(32, "Name cannot start with number")
                 i = i + 1
                 continue
             elif(char in possible_chars):
                 i = i + 1
                 continue
             else:
-                sys.stderr.write("Invalid name\n")
-                sys.exit(32)
-                
+                raise ProgramError(32, "Invalid name")
+
+# decoded instruction with all of its operands
+class Instruction:
+    # attributes are fixed, programs keep millions of instructions
+    # the ones after execute are set only when the engines and the optimizer need them
+    __slots__ = ["opcode", "order", "args", "weight", "jump_weight", "typed", "checks_stack", "updates_peak",
+                 "execute", "fallthrough", "handler", "fused", "tested", "taken", "generic", "observed", "count", "operation"]
+
+    # initializes instruction from its XML element
+    def __init__(self, element):
+        # get the opcode and order number
+        try:
+            self.opcode = sys.intern(element.attrib['opcode'].upper())
+            self.order = int(element.attrib['order'])
+            self.weight = 1         # number of instructions carried out by one execution
+            self.jump_weight = 1    # the same when the instruction jumps somewhere else than to the next one
+            self.typed = False      # types of operands are proven by the optimizer, so they aren't checked
+            self.checks_stack = True    # the optimizer didn't prove there are enough values on data stack
+            self.updates_peak = True    # data stack can be at its deepest after this PUSHS
+        except:
+            raise ProgramError(32, "Invalid XML format")
+
+        # get expected number of operands
+        if(self.opcode in non_arg):
+            count = 0
+        elif(self.opcode in one_arg):
+            count = 1
+        elif(self.opcode in two_arg):
+            count = 2
+        elif(self.opcode in three_arg):
+            count = 3
+        else:
+            raise ProgramError(32, "Invalid opcode")
+
+        # each operand must be given exactly once, no more operands are allowed
+        self.args = []
+        for i in range(1, 4):
+            found = element.findall("arg" + str(i))
+            if(i <= count and len(found) == 1):
+                self.args.append(Operand(found[0]))
+            elif(len(found) != 0 or i <= count):
+                raise ProgramError(32, "Invalid arguments in xml file")
+
+
+# keeps decoded and linked programs on disk, file of each program is named by hash of its XML
+# together with the interpret itself, so any change of either of them uses a different file
+class ProgramCache:
+    # computes the key of given XML source
+    def __init__(self, directory, source):
+        key = hashlib.sha256()
+        key.update(sys.version.encode())
+        with open(__file__, "rb") as interpret_file:
+            key.update(interpret_file.read())
+        key.update(source)
+        self.key = key.hexdigest()
+        self.directory = directory
+        self.path = os.path.join(directory, self.key + ".ippc")
+
+    # restores the program into the interpret, returns False if there is no usable cached program
+    def load(self, interpret):
+        gc.disable()    # like loading from XML, only records are created here
+        try:
+            with open(self.path, "rb") as cache_file:
+                key, instructions, labels, global_names, frame_names = marshal.loads(cache_file.read())
+            if(key != self.key):
+                return False
+
+            program = []
+            for opcode, order, args in instructions:
+                instruction = Instruction.__new__(Instruction)
+                instruction.opcode = opcode
+                instruction.order = order
+                instruction.weight = 1
+                instruction.jump_weight = 1
+                instruction.typed = False
+                instruction.checks_stack = True
+                instruction.updates_peak = True
+                instruction.execute = interpret.dispatch[opcode]
+                instruction.args = []
+                for operand_type, frame, name, value, slot in args:
+                    operand = Operand.__new__(Operand)
+                    operand.type = operand_type
+                    operand.frame = frame
+                    operand.name = name
+                    operand.value = value
+                    operand.slot = slot
+                    operand.checked = True
+                    instruction.args.append(operand)
+                program.append(instruction)
+        except Exception:   # missing or corrupt file, program is loaded from XML
+            return False
+        finally:
+            gc.enable()
+
+        interpret.instructions = program
+        interpret.labels = labels
+        interpret.global_names = global_names
+        interpret.frame_names = frame_names
+        interpret.prepare_frames()
+        return True
+
+    # saves linked program of the interpret, the cache is only an optimization so failures are ignored
+    def store(self, interpret):
+        gc.disable()
+        instructions = []
+        for instruction in interpret.instructions:
+            args = []
+            for operand in instruction.args:
+                args.append((operand.type, operand.frame, operand.name, operand.value, operand.slot))
+            instructions.append((instruction.opcode, instruction.order, args))
+        data = (self.key, instructions, interpret.labels, interpret.global_names, interpret.frame_names)
+        gc.enable()
+
+        # file is written under temporary name first so no run can see it half written
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(descriptor, "wb") as cache_file:
+                    cache_file.write(marshal.dumps(data))
+                os.replace(temporary_path, self.path)
+            except Exception:
+                os.remove(temporary_path)
+        except Exception:
+            pass
 
 # does all the interpreting
 class Interpret:
@@ -183,68 +528,307 @@ class Interpret:
             self.arg.i_f = open(self.arg.input_file, "r")
         else:
             self.arg.i_f = sys.stdin
-            
-        # set the source file
-        if(self.arg.source):
-            self.arg.s_f = open(self.arg.source, "r")
-            try:
-                tree = ET.parse(self.arg.source_file)
-            except:
-                sys.stderr.write("Invalid XML format\n")
-                sys.exit(31)
-        else:
-            try:
-                tree = ET.parse(sys.stdin)
-            except:
-                sys.stderr.write("Invalid XML format\n")
-                sys.exit(31)
 
-        # try to parse the language attribute
-        try:
-            root = tree.getroot()
-            language = root.attrib['language']
-        except:
-            sys.stderr.write("Invalid XML format\n")
-            sys.exit(31)
-
-        if(language != "IPPcode19"):
-            sys.stderr.write("Invalid language\n")
-            sys.exit(32)
+        # output is written out once the buffer is full, at the end or before reading from terminal
+        self.output = OutputBuffer(self.arg.output_size)
+        self.interactive = not self.arg.input and sys.stdin.isatty()
 
         # basic variables for frames and labels
-        self.global_frame = {}
+        self.global_frame = []
         self.local_frames = []
-        self.data_stack = []
+        self.temporary_frame = None     # temporary frame doesn't exist until CREATEFRAME
+        self.free_frames = []           # frames that are no longer used, CREATEFRAME takes them first
+        self.blank_frame = None         # empty local or temporary frame if they are lists, set with slots
+        self.data_stack = []            # engines push and pop with the list itself, it is never replaced
+        self.stack_peak = 0             # the most values the data stack has held at once
         self.labels = {}
-        self.root = root
+        self.constants = {}         # decoded string literals
         self.call_stack = []
         self.can_miss_value = True
+        self.string_buffers = False # strings changed by CONCAT and SETCHAR are kept in StringBuffer
 
         # statistics variables
         self.insts = 0
         self.vars = 0
-        
-
-    # prepares labels and their respective order number
-    def prepare_labels(self):
+        self.count_insts = self.arg.stats and "--insts" in self.arg.stats_arg
+        self.count_vars = self.arg.stats and "--vars" in self.arg.stats_arg
+        self.defined = 0            # currently defined variables in all frames
+        self.local_counts = []      # defined variables in each local frame
+        self.temporary_count = 0    # defined variables in temporary frame
+
+        # dispatch table with handler for each opcode
+        self.dispatch = {}
+        for opcode in non_arg + one_arg + two_arg + three_arg:
+            self.dispatch[opcode] = getattr(self, "execute_" + opcode.lower())
+
+        # decode the whole program once, execution works only with the decoded records
+        self.cached = False
+        if(self.arg.cache):     # program is read whole to compute its key
+            try:
+                if(self.arg.source):
+                    with open(self.arg.source_file, "rb") as source_file:
+                        source = source_file.read()
+                else:
+                    source = sys.stdin.buffer.read()
+            except OSError:
+                self.write_error("Invalid XML format\n")
+                sys.exit(31)
+            self.cache = ProgramCache(self.arg.cache_dir, source)
+            self.cached = self.cache.load(self)
+            if(not self.cached):
+                self.load_program(io.BytesIO(source))
+        elif(self.arg.source):
+            self.load_program(self.arg.source_file)
+        else:
+            self.load_program(sys.stdin)
+
+    # reads the program element by element, each instruction is decoded as soon as its element
+    # is complete and the element is thrown away, so the XML tree is never kept whole in memory
+    def load_program(self, source):
+        self.instructions = []
+        depth = 0
+        error = None        # the first error of the program, held back until the document is known to be well-formed
+
+        # records only pile up while loading, collecting garbage would just walk them over and over
+        collecting = gc.isenabled()
+        gc.disable()
         try:
-            for i in range(0, len(self.root)):
-                if(self.root[i].attrib['opcode'] == "LABEL"):
-                    for child in self.root[i]:
-                        if(child.text in self.labels):
-                            sys.stderr.write("Redefinition of label\n")
-                            sys.exit(52)
-                        self.labels.update({child.text : int(self.root[i].attrib['order'])})
-        except:
-            sys.stderr.write("Invalid XML file\n")
-            sys.exit(32)
+            for event, element in ET.iterparse(source, events=("start", "end")):
+                if(event == "start"):
+                    depth = depth + 1
+                    if(depth == 1):     # root element of the program
+                        root = element
+                        try:
+                            self.check_language(root)
+                        except ProgramError as found:
+                            error = found
+                else:
+                    depth = depth - 1
+                    if(depth == 1):     # instruction element
+                        if(error == None):
+                            try:
+                                self.decode_instruction(element)
+                            except ProgramError as found:
+                                error = found
+                        root.clear()
+        except (ET.ParseError, OSError):
+            self.write_error("Invalid XML format\n")
+            sys.exit(31)
+        finally:
+            if(collecting):
+                gc.enable()
+
+        # report the first error in the program
+        if(error != None):
+            self.write_error(error.message + "\n")
+            sys.exit(error.code)
+
+    # checks the language attribute of the root element
+    def check_language(self, root):
+        if('language' not in root.attrib):
+            raise ProgramError(31, "Invalid XML format")
+
+        if(root.attrib['language'] != "IPPcode19"):
+            raise ProgramError(32, "Invalid language")
+
+    # decodes instruction and converts its literal operands
+    def decode_instruction(self, element):
+        instruction = Instruction(element)
+        instruction.execute = self.dispatch[instruction.opcode]
+        for operand in instruction.args:
+            if(operand.type != "var"):
+                operand.value = self.format_value(operand.value, operand.type)
+        self.instructions.append(instruction)
+
+    # sorts instructions by their order numbers and replaces labels by indices of instructions
+    def link_program(self):
+        if(self.cached):        # cached program is already linked
+            return
+
+        # the whole program is checked before anything runs, handlers rely on it
+        self.verify_program()
+
+        self.instructions.sort(key=lambda instruction: instruction.order)
+
+        # order numbers must be positive and unique, labels must be unique
+        for i in range(0, len(self.instructions)):
+            instruction = self.instructions[i]
+            if(instruction.order < 1):
+                self.write_error("Invalid instruction order number\n")
+                sys.exit(32)
+            if(i > 0 and self.instructions[i - 1].order == instruction.order):
+                self.write_error("Multiple instruction order number\n")
+                sys.exit(32)
+            if(instruction.opcode == "LABEL"):
+                label = instruction.args[0].value
+                if(label in self.labels):
+                    self.write_error("Redefinition of label\n")
+                    sys.exit(52)
+                self.labels.update({label : i})
+
+        # every jump gets index of its destination
+        for instruction in self.instructions:
+            if(instruction.opcode in jump_opcodes):
+                destination = instruction.args[0]
+                if(destination.value not in self.labels):
+                    self.write_error("Undefined label\n")
+                    sys.exit(52)
+                destination.value = self.labels[destination.value]
+
+        # every variable gets its slot in the frame
+        self.allocate_slots()
+
+        # next runs of the same program can skip loading
+        if(self.arg.cache):
+            self.cache.store(self)
+
+    # finds PUSHS after which the data stack can be at its deepest, only they update its peak depth
+    # depth is followed in straight parts of the program, each part can start with any depth that is within the peak
+    # parts end with jumps and their destinations, CLEARS and BREAK, which writes the peak depth out
+    def find_peak_pushes(self):
+        targets = set()
+        for instruction in self.instructions:
+            if(instruction.opcode in jump_opcodes):
+                targets.add(instruction.args[0].value)
+
+        for i in range(0, len(self.instructions)):
+            instruction = self.instructions[i]
+            if(i == 0 or i in targets or self.instructions[i - 1].opcode in jump_opcodes + ["RETURN", "CLEARS", "BREAK"]):
+                depth = 0       # new part starts
+                highest = 0
+                deepest = None
+            if(instruction.opcode in stack_effects):
+                depth = depth + stack_effects[instruction.opcode][1]
+            if(instruction.opcode == "PUSHS"):
+                instruction.updates_peak = False
+                if(depth > highest):        # only the deepest PUSHS of the part is left
+                    if(deepest != None):
+                        deepest.updates_peak = False
+                    instruction.updates_peak = True
+                    highest = depth
+                    deepest = instruction
+
+        # other PUSHS keep the handler that doesn't look at the peak
+        for instruction in self.instructions:
+            if(instruction.opcode == "PUSHS" and instruction.updates_peak):
+                instruction.execute = self.execute_pushs_peak
+
+    # replaces frequent sequences of instructions by superinstructions, the first instruction of
+    # the sequence gets handler for the whole sequence, others stay unchanged as they can be jumped to
+    def fuse_instructions(self):
+        i = 0
+        while i < len(self.instructions):
+            instruction = self.instructions[i]
+            following = self.instructions[i + 1:i + 3]
+            if(instruction.opcode in straight_opcodes and len(following) == 2 and
+               following[0].opcode in compare_opcodes and self.tests_result(following[0], following[1])):
+                execute = self.execute_fused_compare_jump
+            elif(instruction.opcode in compare_opcodes and len(following) >= 1 and
+                 self.tests_result(instruction, following[0])):
+                execute = self.execute_fused_jump_on_result
+                following = following[:1]
+            elif((instruction.opcode in straight_opcodes or instruction.opcode in compare_opcodes) and
+                 len(following) >= 1 and following[0].opcode == "JUMP"):
+                execute = self.execute_fused_jump
+                following = following[:1]
+            else:
+                i = i + 1
+                continue
+
+            # the sequence ends with a jump, only its weight depends on whether it jumps
+            weight = instruction.weight
+            for fused in following[:-1]:
+                weight = weight + fused.weight
+            instruction.handler = instruction.execute
+            instruction.execute = execute
+            instruction.fused = following
+            instruction.fallthrough = i + 1 + len(following)
+            instruction.jump_weight = weight + following[-1].jump_weight
+            instruction.weight = weight + following[-1].weight
+            i = instruction.fallthrough
+
+    # instructions that can be specialized start observing types of their operands
+    def prepare_quickening(self):
+        if(self.count_vars):        # specialized handlers don't count defined variables
+            return
+        for instruction in self.instructions:
+            if(instruction.opcode in quick_operations and not instruction.typed):
+                instruction.generic = instruction.execute
+                instruction.observed = None
+                instruction.count = 0
+                instruction.execute = self.execute_adaptive
+
+    # checks whether conditional jump only tests result of comparison against bool constant
+    def tests_result(self, compare, jump):
+        if(jump.opcode != "JUMPIFEQ" and jump.opcode != "JUMPIFNEQ"):
+            return False
+
+        result = compare.args[0]
+        for tested, constant in [(jump.args[1], jump.args[2]), (jump.args[2], jump.args[1])]:
+            if(tested.type == "var" and tested.frame == result.frame and tested.slot == result.slot and
+               constant.type == "bool"):
+                jump.tested = tested
+                jump.taken = constant.value == (jump.opcode == "JUMPIFEQ")   # result that makes the jump
+                return True
+        return False
+
+    # checks kind of every operand and frame of every variable
+    def verify_program(self):
+        for instruction in self.instructions:
+            kinds = operand_kinds[instruction.opcode]
+            for i in range(0, len(kinds)):
+                operand = instruction.args[i]
+                if(operand.type == "var"):
+                    valid = kinds[i] == "var" or kinds[i] == "symb"
+                elif(operand.type in constant_types):
+                    valid = kinds[i] == "symb"
+                else:                           # label or type
+                    valid = kinds[i] == operand.type
+                if(not valid):
+                    self.write_error(operand.type + " cannot be used as " + kinds[i] + " operand\n")
+                    sys.exit(32)
+
+                if(operand.type == "var" and operand.frame not in ["GF", "LF", "TF"]):
+                    self.write_error("Invalid frame\n")
+                    sys.exit(32)
+
+    # assigns fixed slot to every variable, variable names are always given statically so every
+    # global variable has its own slot in the global frame and every name of local or temporary
+    # variable has its own slot in the list or key in the Frame of local and temporary frames
+    def allocate_slots(self):
+        global_slots = {}
+        frame_slots = {}
+        self.global_names = []
+        self.frame_names = []
+        for instruction in self.instructions:
+            for operand in instruction.args:
+                if(operand.type != "var"):
+                    continue
+                if(operand.frame == "GF"):
+                    if(operand.name not in global_slots):
+                        global_slots.update({operand.name : len(self.global_names)})
+                        self.global_names.append(operand.name)
+                    operand.slot = global_slots[operand.name]
+                elif(operand.frame == "LF" or operand.frame == "TF"):
+                    if(operand.name not in frame_slots):
+                        frame_slots.update({operand.name : len(self.frame_names)})
+                        self.frame_names.append(operand.name)
+                    operand.slot = frame_slots[operand.name]
+        self.prepare_frames()
+
+    # creates slots of global variables and chooses how local and temporary frames are kept,
+    # list of all slots is faster to index than Frame, but every frame of it is as long as all the names
+    def prepare_frames(self):
+        self.global_frame.extend([undefined] * len(self.global_names))
+        if(len(self.frame_names) <= list_frame_names):
+            self.blank_frame = [undefined] * len(self.frame_names)
+        else:
+            self.blank_frame = None     # frames are Frame
 
     # checks whether integer value is really integer
     def check_number(self, number):
-        for i in range(0, len(number)):
-            if(number[i] != '-' and not str.isdigit(number[i])):
-                sys.stderr.write("Value is not integer\n")
-                sys.exit(32)
+        if(number == None or integer_literal.fullmatch(number) == None):
+            raise ProgramError(32, "Value is not integer")
         return int(number)
 
     # formats the value 
@@ -257,145 +841,129 @@ class Interpret:
             elif(value == "false"):
                 return False
             else:
-                sys.stderr.write("Value is not bool\n")
-                sys.exit(32)
+                raise ProgramError(32, "Value is not bool")
         elif(value_type == "string"):   # normal string
-            if(isinstance(value_type, str)):
-                return value
-            else:
-                sys.stderr.write("Value is not string\n")
-                sys.exit(32)
+            if(value == None):          # empty element is an empty string
+                return ""
+            return self.decode_string(value)
         elif(value_type == "label"):
             return value
         elif(value_type == "type"):
+            if(value not in type_names):
+                raise ProgramError(32, "Invalid type")
             return value
         elif(value_type == "nil"):
+            if(value != "nil"):
+                raise ProgramError(32, "Value is not nil")
             return value
         else:                           # error
-            sys.stderr.write("Invalid value type\n")
-            sys.exit(52)
+            raise ProgramError(52, "Invalid value type")
 
     # gets value of argument
-    def get_argument_value(self, argument):
+    def get_argument_value(self, argument, buffered=False):
         if(argument.type == "var"): # variable is checked according to the frames
             if(argument.frame == "GF"): # global frame
-                try:
-                    value = self.global_frame[argument.name]
-                except:
-                    sys.stderr.write("Variable in given frame doesn't exist\n")
+                value = self.global_frame[argument.slot]
+                if(value is undefined):
+                    self.write_error("Variable in given frame doesn't exist\n")
                     sys.exit(54)
             elif(argument.frame == "LF"):   # local frame
                 if(len(self.local_frames) == 0):    # check how many local frames we have
-                    sys.stderr.write("Frame that doesn't exist\n")
+                    self.write_error("Frame that doesn't exist\n")
                     sys.exit(55)
-                try:
-                    value = self.local_frames[len(self.local_frames)-1][argument.name]
-                except:
-                    sys.stderr.write("Variable in given frame doesn't exist\n")
+                value = self.local_frames[-1][argument.slot]
+                if(value is undefined):
+                    self.write_error("Variable in given frame doesn't exist\n")
                     sys.exit(54)
-            elif(argument.frame == "TF"):   # temporary frame
-                try:
-                    self.temporary_frame
-                except:
-                    sys.stderr.write("Frame doesn't exist\n")
+            else:                           # temporary frame
+                if(self.temporary_frame == None):
+                    self.write_error("Frame doesn't exist\n")
                     sys.exit(55)
-
-                if(argument.name not in self.temporary_frame.keys()):
-                    sys.stderr.write("Variable doesn't exist\n")
+                value = self.temporary_frame[argument.slot]
+                if(value is undefined):
+                    self.write_error("Variable doesn't exist\n")
                     sys.exit(54)
-                else:
-                        value = self.temporary_frame[argument.name]
-            else:
-                sys.stderr.write("Inalid frame type")
-                sys.exit(32)
 
             if(self.can_miss_value):
                 if(value == None):
-                    sys.stderr.write("Missing value\n")
+                    self.write_error("Missing value\n")
                     sys.exit(56)
+            if(type(value) is StringBuffer and not buffered):   # string handlers can work with the buffer itself
+                value = value.value()
             return value
-        else:                               # return the formatted value
-            return self.format_value(argument.value, argument.type)
+        else:                               # literals are already converted
+            return argument.value
 
-    
     # insert value to given frame
-    def insert_to_frame(self, name, target_frame, value):
-        if(target_frame == "GF"):   # check for target frame
-            if(name in self.global_frame.keys()):
-                self.global_frame[name] = value
-            else:
-                self.global_frame.update({name : value})
-        elif(target_frame == "LF"): # check for target frame
+    def insert_to_frame(self, argument, value):
+        if(argument.frame == "GF"):   # check for target frame
+            frame = self.global_frame
+        elif(argument.frame == "LF"): # check for target frame
             if(len(self.local_frames) == 0):
-                sys.stderr.write("Missing frame\n")
+                self.write_error("Missing frame\n")
                 sys.exit(55)
-            else:
-                if(name in self.local_frames[len(self.local_frames) - 1].keys()):
-                    self.local_frames[len(self.local_frames) - 1][name] = value
-                else:
-                    self.local_frames[len(self.local_frames) - 1].update({name : value})
-        elif(target_frame == "TF"): # check for target frame
-            try:
-                if(name in self.temporary_frame.keys()):
-                    self.temporary_frame[name] = value
-                else:
-                    self.temporary_frame.update({name : value})
-            except:
+            frame = self.local_frames[-1]
+        else:                         # temporary frame
+            if(self.temporary_frame == None):
                 sys.exit(55)
-        else:   # this is not a frame
-            sys.stderr.write("Invalid frame\n")
-            sys.exit(32)
-
-    # TODO DELELTE
-    def debug_print(self):
-        print("")
-        print(self.counter)
-        print("Data stack " + str(self.data_stack))
-        print("Global " + str(self.global_frame))
-        print("Local " + str(self.local_frames))
-        try:
-            print("Temporary " + str(self.temporary_frame))
-        except:
-            pass
-        print("")
+            frame = self.temporary_frame
+
+        if(self.count_vars):
+            self.count_defined_variable(argument.frame, frame[argument.slot], value)
+        frame[argument.slot] = value
+
+    # gets variables of frame as dictionary of their names and values
+    def frame_contents(self, frame, names):
+        contents = {}
+        if(type(frame) is Frame):
+            slots = list(frame)         # only defined variables, in the order of their definitions
+        else:
+            slots = range(0, len(frame))
+        for slot in slots:
+            if(type(frame[slot]) is StringBuffer):
+                contents.update({names[slot] : frame[slot].value()})
+            elif(frame[slot] is not undefined):
+                contents.update({names[slot] : frame[slot]})
+        return contents
+
+    # writes error message of the program, output written by the program before is written out first
+    # so both keep their order when they go to the same place
+    def write_error(self, message):
+        self.output.flush()
+        sys.stderr.write(message)
 
     # starts with interpreting
     def start(self):
-        self.counter = 1
-        self.order = {}
-        
-        # prepare xml correct order
-        cnt = 0
-        for i in self.root:
-            num = int(i.attrib['order'])
-            if(num in self.order.keys()):
-                sys.stderr.write("Multiple instruction order number\n")
-                sys.exit(32)
-            self.order.update({num : cnt})
-            cnt = cnt + 1
+        self.counter = 0
 
-        #print("These are my variables")
-        #print(self.order)
-        #print(self.labels)
-        #print("")
+        # optimized program stands for the original one, including its --insts statistics
+        if(self.arg.level > 0):
+            Optimizer(self, self.arg.level).run()
+        for i in range(0, len(self.instructions)):
+            self.instructions[i].fallthrough = i + 1    # index of the next instruction when there is no jump
+        self.find_peak_pushes()
 
         # execute instruction
-        while self.counter < (len(self.root) + 1):
-            try:
-                current_instruction = self.order[self.counter]
-            except:
-                sys.stderr.write("Invalid instruction order number\n")
-                sys.exit(32)
-            #print("I will execute instruction with op_num " + str(current_instruction))
-            self.execute_instruction(current_instruction)
+        if(self.arg.engine_name == "closure"):
+            ClosureEngine(self).run()
+        elif(self.arg.engine_name == "transpile"):
+            transpiler = Transpiler(self)
+            if(self.arg.dump):
+                dump_file = open(self.arg.dump_file, "w")
+                dump_file.write(transpiler.source)
+                dump_file.close()
+            transpiler.run()
+        else:
+            self.string_buffers = True
+            self.prepare_quickening()
+            self.fuse_instructions()
+            while self.counter < len(self.instructions):
+                self.execute_instruction(self.counter)
 
         # close the files
         if(self.arg.input):
             self.arg.i_f.close()
 
-        if(self.arg.source):
-            self.arg.s_f.close()
-
         # output the statistics if needed
         if(self.arg.stats):
             stat_file = open(self.arg.stats_file, "w")
@@ -417,637 +985,832 @@ class Interpret:
     # checks existence of variable
     def check_variable_existence(self, arg):
         if(arg.frame == "GF"):                             # check for existence of variable
-            if(arg.name not in self.global_frame):
-                sys.stderr.write("Variable doesn't exist\n")
+            if(self.global_frame[arg.slot] is undefined):
+                self.write_error("Variable doesn't exist\n")
                 sys.exit(54)
         elif(arg.frame == "TF"):
-            try:
-                self.temporary_frame
-            except:
-                sys.stderr.write("Frame doesn't exist\n")
+            if(self.temporary_frame == None):
+                self.write_error("Frame doesn't exist\n")
                 sys.exit(55)
-            if(arg.name not in self.temporary_frame.keys()):
-                sys.stderr.write("Variable doesn't exist\n")
+            if(self.temporary_frame[arg.slot] is undefined):
+                self.write_error("Variable doesn't exist\n")
                 sys.exit(54)
         elif(arg.frame == "LF"):
             if(len(self.local_frames) == 0):
-                sys.stderr.write("Missing frame\n")
+                self.write_error("Missing frame\n")
                 sys.exit(55)
             else:
-                if(arg.name not in self.local_frames[len(self.local_frames) - 1].keys()):
-                    sys.stderr.write("Variable doesn't exist\n")
+                if(self.local_frames[-1][arg.slot] is undefined):
+                    self.write_error("Variable doesn't exist\n")
                     sys.exit(54)
 
 
     # executes each instruction
     def execute_instruction(self, op_num):
-        # get the current opcode
-        try:
-            current_opcode = self.root[op_num].attrib['opcode']
-            current_opcode = current_opcode.upper()
-        except:
-            sys.stderr.write("Invalid XML format\n")
-            sys.exit(32)
+        instruction = self.instructions[op_num]
+        instruction.execute(instruction)
 
-        #print("This is opcode no " + str(self.counter) + " instruction: " + current_opcode)
-        #print("Call stack is " + str(self.call_stack))
+        # statistics for instructions that were carried out
+        if(self.count_insts):
+            if(self.counter == instruction.fallthrough):
+                self.insts = self.insts + instruction.weight
+            else:
+                self.insts = self.insts + instruction.jump_weight
 
-        # prepare args #
-        if(current_opcode in non_arg):
-            # too many arguments
-            if(len(self.root[op_num].findall("arg1")) != 0):
-                sys.stderr.write("Invalid arguments in xml file\n")
-                sys.exit(32)
-        # one argument
-        elif(current_opcode in one_arg):
-            try:
-                # get arguments
-                first_arg = self.root[op_num].findall("arg1")[0]
-            except:
-                sys.stderr.write("Invalid arguments in xml file\n")
-                sys.exit(32)
-            # too many arguments
-            if(len(self.root[op_num].findall("arg1")) != 1):
-                sys.stderr.write("Invalid arguments in xml file\n")
-                sys.exit(32)
-            arg1 = Operand(first_arg)
-        # two arguments
-        elif(current_opcode in two_arg):
-            try:
-                # get arguments
-                first_arg = self.root[op_num].findall("arg1")[0]
-                second_arg = self.root[op_num].findall("arg2")[0]
-            except:
-                sys.stderr.write("Invalid arguments in xml file\n")
-                sys.exit(32)
-            # too many arguments
-            if(len(self.root[op_num].findall("arg1")) != 1):
-                sys.stderr.write("Invalid arguments in xml file\n")
-                sys.exit(32)
-            if(len(self.root[op_num].findall("arg2")) != 1):
-                sys.stderr.write("Invalid arguments in xml file\n")
-                sys.exit(32)
-            arg1 = Operand(first_arg)
-            arg2 = Operand(second_arg)
-        # three arguments
-        elif(current_opcode in three_arg):
-            try:
-                # get arguments
-                first_arg = self.root[op_num].findall("arg1")[0]
-                second_arg = self.root[op_num].findall("arg2")[0]
-                third_arg = self.root[op_num].findall("arg3")[0]
-            except:
-                sys.stderr.write("Invalid arguments in xml file\n")
-                sys.exit(32)
-            # too many arguments
-            if(len(self.root[op_num].findall("arg1")) != 1):
-                sys.stderr.write("Invalid arguments in xml file\n")
-                sys.exit(32)
-            if(len(self.root[op_num].findall("arg2")) != 1):
-                sys.stderr.write("Invalid arguments in xml file\n")
-                sys.exit(32)
-            if(len(self.root[op_num].findall("arg3")) != 1):
-                sys.stderr.write("Invalid arguments in xml file\n")
-                sys.exit(32)
-            arg1 = Operand(first_arg)
-            arg2 = Operand(second_arg)
-            arg3 = Operand(third_arg)
-        else:
-            sys.exit(32)
+        # statistics for total number of defined variables
+        if(self.count_vars):
+            self.calculate_defined_variables()
 
-        # CREATEFRAME
-        if(current_opcode == "CREATEFRAME"):    # creates frame and increments counter
-            self.temporary_frame = {}
-            self.counter = self.counter + 1
-        # PUSHFRAME
-        elif(current_opcode == "PUSHFRAME"):    # tries to push frame if exists, if not, error
-            try:
-                self.local_frames.append(self.temporary_frame)
-                del self.temporary_frame
-            except:
-                sys.stderr.write("Temporary frame doesn't exist\n")
-                sys.exit(55)
+    #
+    #       SUPERINSTRUCTIONS
+    #
+    # instruction followed by JUMP
+    def execute_fused_jump(self, instruction):
+        instruction.handler(instruction)
+        self.counter = instruction.fused[0].args[0].value
+
+    # LT, GT or EQ followed by conditional jump that tests its result
+    def execute_fused_jump_on_result(self, instruction):
+        instruction.handler(instruction)
+        self.jump_on_result(instruction.fused[0])
+
+    # instruction followed by LT, GT or EQ and conditional jump that tests its result
+    def execute_fused_compare_jump(self, instruction):
+        instruction.handler(instruction)
+        compare, jump = instruction.fused
+        compare.execute(compare)
+        self.jump_on_result(jump)
+
+    # finishes conditional jump on result of comparison, the result is always bool so no checks are needed
+    def jump_on_result(self, jump):
+        if(self.get_argument_value(jump.tested) == jump.taken):
+            self.counter = jump.args[0].value
+        else:
             self.counter = self.counter + 1
-        # POPFRAME
-        elif(current_opcode == "POPFRAME"):     # pops frame from the local frame stack if it exists
+
+    #
+    #       INSTRUCTIONS WITH PROVEN TYPES
+    #
+    # gets value of literal or global variable that surely has a value
+    def typed_value(self, argument):
+        if(argument.type == "var"):
+            value = self.global_frame[argument.slot]
+            if(type(value) is StringBuffer):
+                return value.value()
+            return value
+        return argument.value
+
+    # ADD with integer operands
+    def execute_typed_add(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        self.global_frame[arg1.slot] = self.typed_value(arg2) + self.typed_value(arg3)
+        self.counter = self.counter + 1
+
+    # SUB with integer operands
+    def execute_typed_sub(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        self.global_frame[arg1.slot] = self.typed_value(arg2) - self.typed_value(arg3)
+        self.counter = self.counter + 1
+
+    # MUL with integer operands
+    def execute_typed_mul(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        self.global_frame[arg1.slot] = self.typed_value(arg2) * self.typed_value(arg3)
+        self.counter = self.counter + 1
+
+    # IDIV with integer operands, only zero division is left to check
+    def execute_typed_idiv(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        value_2 = self.typed_value(arg3)
+        if(value_2 == 0):
+            self.write_error("Zero division\n")
+            sys.exit(57)
+        self.global_frame[arg1.slot] = int(self.typed_value(arg2) / value_2)
+        self.counter = self.counter + 1
+
+    # LT with operands of the same type
+    def execute_typed_lt(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        self.global_frame[arg1.slot] = self.typed_value(arg2) < self.typed_value(arg3)
+        self.counter = self.counter + 1
+
+    # GT with operands of the same type
+    def execute_typed_gt(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        self.global_frame[arg1.slot] = self.typed_value(arg2) > self.typed_value(arg3)
+        self.counter = self.counter + 1
+
+    # EQ with operands of the same type
+    def execute_typed_eq(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        self.global_frame[arg1.slot] = self.typed_value(arg2) == self.typed_value(arg3)
+        self.counter = self.counter + 1
+
+    #
+    #       QUICKENING
+    #
+    # gets value of argument without any checks, undefined if there is none, StringBuffer is not joined
+    def peek(self, argument):
+        if(argument.type != "var"):
+            return argument.value
+        elif(argument.frame == "GF"):
+            return self.global_frame[argument.slot]
+        elif(argument.frame == "LF"):
             if(len(self.local_frames) == 0):
-                sys.stderr.write("No frame to pop\n")
-                sys.exit(55)
-            else:   # delete top part
-                self.temporary_frame = (self.local_frames[len(self.local_frames) - 1]).copy()
-                del self.local_frames[len(self.local_frames) - 1]
-            self.counter = self.counter + 1
-        # DEFVAR <var>
-        elif(current_opcode == "DEFVAR"):
-            self.insert_to_frame(arg1.name, arg1.frame, None)   # define variable
-            self.counter = self.counter + 1
-        # MOVE <var> <symb>
-        elif(current_opcode == "MOVE"):
-            if(arg2.type == "label"):   # cannot move label
-                sys.stderr.write("Label cannot be moved into variable\n")
-                sys.exit(32)
+                return undefined
+            return self.local_frames[-1][argument.slot]
+        if(self.temporary_frame == None):
+            return undefined
+        return self.temporary_frame[argument.slot]
+
+    # replaces handler of instruction, the first instruction of superinstruction keeps it as its part
+    def install(self, instruction, handler):
+        if(instruction.execute in [self.execute_fused_jump, self.execute_fused_jump_on_result, self.execute_fused_compare_jump]):
+            instruction.handler = handler
+        else:
+            instruction.execute = handler
+
+    # observes types of operands, instruction that keeps getting the same types is specialized for them
+    def execute_adaptive(self, instruction):
+        types = (type(self.peek(instruction.args[1])), type(self.peek(instruction.args[2])))
+        if(types == instruction.observed):
+            instruction.count = instruction.count + 1
+        else:
+            instruction.observed = types
+            instruction.count = 1
+
+        if(instruction.count >= warmup):
+            operation, specialized = quick_operations[instruction.opcode]
+            if(types not in specialized):           # nothing to specialize for
+                self.install(instruction, instruction.generic)
+            elif(operation == None):
+                self.install(instruction, self.execute_quick_index)
+            else:
+                self.install(instruction, self.execute_quick_operation)
+            instruction.operation = operation
+            instruction.count = 0
+        instruction.generic(instruction)
+
+    # guard of specialized instruction failed, the generic handler takes care of it
+    def execute_missed(self, instruction):
+        instruction.count = instruction.count + 1
+        if(instruction.count >= warmup):           # types changed, observe them again
+            instruction.observed = None
+            instruction.count = 0
+            self.install(instruction, self.execute_adaptive)
+        instruction.generic(instruction)
+
+    # instruction specialized for observed types of operands
+    def execute_quick_operation(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        value_1 = self.peek(arg2)
+        value_2 = self.peek(arg3)
+        types = instruction.observed
+        if(type(value_1) is not types[0] or type(value_2) is not types[1] or self.peek(arg1) is undefined):
+            self.execute_missed(instruction)
+            return
+        self.insert_to_frame(arg1, instruction.operation(value_1, value_2))
+        self.counter = self.counter + 1
+
+    # GETCHAR or STRI2INT specialized for string and integer index within the string
+    def execute_quick_index(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        string = self.peek(arg2)
+        index = self.peek(arg3)
+        if(type(string) is not str or type(index) is not int or not -len(string) <= index < len(string) or
+           self.peek(arg1) is undefined):
+            self.execute_missed(instruction)
+            return
+        if(instruction.opcode == "GETCHAR"):
+            self.insert_to_frame(arg1, string[index])
+        else:
+            self.insert_to_frame(arg1, ord(string[index]))
+        self.counter = self.counter + 1
+
+    # CREATEFRAME - creates frame and increments counter
+    def execute_createframe(self, instruction):
+        if(self.count_vars):    # variables of previous temporary frame are lost
+            self.defined = self.defined - self.temporary_count
+            self.temporary_count = 0
+        self.temporary_frame = self.new_frame()
+        self.counter = self.counter + 1
+
+    # gets empty frame, frame that is no longer used is cleared instead of allocating new one
+    # previous temporary frame is lost when new one is created, so it is the first to be used again
+    def new_frame(self):
+        if(self.temporary_frame != None):
+            frame = self.temporary_frame
+        elif(len(self.free_frames) != 0):
+            frame = self.free_frames.pop()
+        elif(self.blank_frame == None):
+            return Frame()
+        else:
+            return list(self.blank_frame)
+        if(self.blank_frame == None):
+            frame.clear()
+        else:
+            frame[:] = self.blank_frame
+        return frame
+
+    # PUSHFRAME - tries to push frame if exists, if not, error
+    def execute_pushframe(self, instruction):
+        if(self.temporary_frame == None):
+            self.write_error("Temporary frame doesn't exist\n")
+            sys.exit(55)
+        self.local_frames.append(self.temporary_frame)
+        self.temporary_frame = None
+        if(self.count_vars):
+            self.local_counts.append(self.temporary_count)
+            self.temporary_count = 0
+        self.counter = self.counter + 1
+
+    # POPFRAME - pops frame from the local frame stack if it exists
+    def execute_popframe(self, instruction):
+        if(len(self.local_frames) == 0):
+            self.write_error("No frame to pop\n")
+            sys.exit(55)
+        else:   # frame is moved from the top, previous temporary frame can be used again
+            if(self.temporary_frame != None):
+                self.free_frames.append(self.temporary_frame)
+            self.temporary_frame = self.local_frames.pop()
+            if(self.count_vars):    # variables of previous temporary frame are lost
+                self.defined = self.defined - self.temporary_count
+                self.temporary_count = self.local_counts.pop()
+        self.counter = self.counter + 1
+
+    # DEFVAR <var>
+    def execute_defvar(self, instruction):
+        arg1 = instruction.args[0]
+        self.insert_to_frame(arg1, None)   # define variable
+        self.counter = self.counter + 1
+
+    # MOVE <var> <symb>
+    def execute_move(self, instruction):
+        arg1, arg2 = instruction.args
+        if(arg1.checked):
             self.check_variable_existence(arg1)
-            if(arg2.type == "var"):
+        if(arg2.type == "var"):
+            if(arg2.checked):
                 self.check_variable_existence(arg2)
 
-            value = self.get_argument_value(arg2)               # copy value
-            if(arg2.type == "var"):
-                self.check_variable_existence(arg2)
-            self.insert_to_frame(arg1.name, arg1.frame, value)
-            self.counter = self.counter + 1
-        # PUSHS <symb>
-        elif(current_opcode == "PUSHS"):
-            if(arg1.type == "label"):   # cannot move label
-                sys.stderr.write("Label cannot be pushed into variable\n")
-                sys.exit(32)
-            value = self.get_argument_value(arg1)               # push value to data sack
-            self.data_stack.append(value)
-            self.counter = self.counter + 1
-        # POPS <var>
-        elif(current_opcode == "POPS"):                         # pops value from stack if it can and saves it to variables
-            if(len(self.data_stack) == 0):
-                sys.stderr.write("Missing value on data stack\n")
-                sys.exit(56)
-            value = self.data_stack[len(self.data_stack) - 1]
-            del self.data_stack[len(self.data_stack) - 1]
+        value = self.get_argument_value(arg2)               # copy value
+        self.insert_to_frame(arg1, value)
+        self.counter = self.counter + 1
+
+    # PUSHS <symb> followed by POPS <var>, the optimizer joins them into MOVE that checks its operands
+    # in the same order as the original instructions
+    def execute_stack_move(self, instruction):
+        arg1, arg2 = instruction.args
+        value = self.get_argument_value(arg2)
+        if(arg1.checked):
             self.check_variable_existence(arg1)
-            self.insert_to_frame(arg1.name, arg1.frame, value)
-            self.counter = self.counter + 1
-        # ADD <var> <symb> <symb>
-        elif(current_opcode == "ADD"):                          # adds 2 operands
-            value_1 = self.get_argument_value(arg2)
-            value_2 = self.get_argument_value(arg3)
+        self.insert_to_frame(arg1, value)
+        self.counter = self.counter + 1
+
+    # PUSHS <symb>
+    def execute_pushs(self, instruction):
+        arg1 = instruction.args[0]
+        value = self.get_argument_value(arg1)               # push value to data sack
+        self.data_stack.append(value)
+        self.counter = self.counter + 1
+
+    # PUSHS <symb> after which the data stack can be at its deepest
+    def execute_pushs_peak(self, instruction):
+        arg1 = instruction.args[0]
+        value = self.get_argument_value(arg1)
+        self.data_stack.append(value)
+        if(len(self.data_stack) > self.stack_peak):
+            self.stack_peak = len(self.data_stack)
+        self.counter = self.counter + 1
+
+    # POPS <var> - pops value from stack if it can and saves it to variables
+    def execute_pops(self, instruction):
+        arg1 = instruction.args[0]
+        if(instruction.checks_stack and len(self.data_stack) == 0):
+            self.write_error("Missing value on data stack\n")
+            sys.exit(56)
+        value = self.data_stack.pop()
+        if(arg1.checked):
             self.check_variable_existence(arg1)
-            if(isinstance(value_1, bool) or isinstance(value_2, bool)):
-                sys.stderr.write("Invalid operand types\n")
-                sys.exit(53)
+        self.insert_to_frame(arg1, value)
+        self.counter = self.counter + 1
+
+    # ADD <var> <symb> <symb> - adds 2 operands
+    def execute_add(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        value_1 = self.get_argument_value(arg2)
+        value_2 = self.get_argument_value(arg3)
+        if(arg1.checked):
+            self.check_variable_existence(arg1)
+        if(isinstance(value_1, bool) or isinstance(value_2, bool)):
+            self.write_error("Invalid operand types\n")
+            sys.exit(53)
 
-            if(isinstance(value_1, int) and isinstance(value_2, int)):  # we can only add 2 integers
-                result = int(value_1 + value_2)
-                self.insert_to_frame(arg1.name, arg1.frame, result) # save the result
-            else:
-                sys.stderr.write("Invalid operand types\n")
-                sys.exit(53)
-            self.counter = self.counter + 1
-        # SUB <var> <symb> <symb>
-        elif(current_opcode == "SUB"):                      # subtracts 2 operands
-            value_1 = self.get_argument_value(arg2)
-            value_2 = self.get_argument_value(arg3)
+        if(isinstance(value_1, int) and isinstance(value_2, int)):  # we can only add 2 integers
+            result = int(value_1 + value_2)
+            self.insert_to_frame(arg1, result) # save the result
+        else:
+            self.write_error("Invalid operand types\n")
+            sys.exit(53)
+        self.counter = self.counter + 1
+
+    # SUB <var> <symb> <symb> - subtracts 2 operands
+    def execute_sub(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        value_1 = self.get_argument_value(arg2)
+        value_2 = self.get_argument_value(arg3)
+        if(arg1.checked):
             self.check_variable_existence(arg1)
-            if(isinstance(value_1, bool) or isinstance(value_2, bool)):
-                sys.stderr.write("Invalid operand types\n")
-                sys.exit(53)
+        if(isinstance(value_1, bool) or isinstance(value_2, bool)):
+            self.write_error("Invalid operand types\n")
+            sys.exit(53)
 
-            if(isinstance(value_1, int) and isinstance(value_2, int)):  # we can only subtract 2 integers
-                result = int(value_1 - value_2)                     # save the result
-                self.insert_to_frame(arg1.name, arg1.frame, result)
-            else:
-                sys.stderr.write("Invalid operand types\n")
-                sys.exit(53)
-            self.counter = self.counter + 1
-        # MUL <var> <symb> <symb>
-        elif(current_opcode == "MUL"):                      # multiplies 2 oeprands
-            value_1 = self.get_argument_value(arg2)
-            value_2 = self.get_argument_value(arg3)
+        if(isinstance(value_1, int) and isinstance(value_2, int)):  # we can only subtract 2 integers
+            result = int(value_1 - value_2)                     # save the result
+            self.insert_to_frame(arg1, result)
+        else:
+            self.write_error("Invalid operand types\n")
+            sys.exit(53)
+        self.counter = self.counter + 1
+
+    # MUL <var> <symb> <symb> - multiplies 2 oeprands
+    def execute_mul(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        value_1 = self.get_argument_value(arg2)
+        value_2 = self.get_argument_value(arg3)
+        if(arg1.checked):
             self.check_variable_existence(arg1)
-            if(isinstance(value_1, bool) or isinstance(value_2, bool)):
-                sys.stderr.write("Invalid operand types\n")
-                sys.exit(53)
+        if(isinstance(value_1, bool) or isinstance(value_2, bool)):
+            self.write_error("Invalid operand types\n")
+            sys.exit(53)
 
-            if(isinstance(value_1, int) and isinstance(value_2, int)):  # it can only be 2 integers
-                result = int(value_1 * value_2)                     # save the result
-                self.insert_to_frame(arg1.name, arg1.frame, result)
-            else:
-                sys.stderr.write("Invalid operand types\n")
-                sys.exit(53)
-            self.counter = self.counter + 1
-        # IDIV <var> <symb> <symb>
-        elif(current_opcode == "IDIV"):                                 # we divide one operand by the other
-            value_1 = self.get_argument_value(arg2)
-            value_2 = self.get_argument_value(arg3)
+        if(isinstance(value_1, int) and isinstance(value_2, int)):  # it can only be 2 integers
+            result = int(value_1 * value_2)                     # save the result
+            self.insert_to_frame(arg1, result)
+        else:
+            self.write_error("Invalid operand types\n")
+            sys.exit(53)
+        self.counter = self.counter + 1
+
+    # IDIV <var> <symb> <symb> - we divide one operand by the other
+    def execute_idiv(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        value_1 = self.get_argument_value(arg2)
+        value_2 = self.get_argument_value(arg3)
+        if(arg1.checked):
             self.check_variable_existence(arg1)
-            if(isinstance(value_1, bool) or isinstance(value_2, bool)):
-                sys.exit(53)
+        if(isinstance(value_1, bool) or isinstance(value_2, bool)):
+            sys.exit(53)
 
-            if(isinstance(value_1, int) and isinstance(value_2, int)):  # it can only be 2 integers
-                if(value_2 == 0):
-                    sys.stderr.write("Zero division\n")
-                    sys.exit(57)
-                result = int(int(value_1) / int(value_2))                 # save and round the result
-                self.insert_to_frame(arg1.name, arg1.frame, result)
-            else:
-                sys.stderr.write("Invalid operand types\n")
-                sys.exit(53)
-            self.counter = self.counter + 1
-        # LT <var> <symb> <symb>
-        elif(current_opcode == "LT"):                       # carries out 'less than' operation for 2 operands
-            value_1 = self.get_argument_value(arg2)
-            value_2 = self.get_argument_value(arg3)
+        if(isinstance(value_1, int) and isinstance(value_2, int)):  # it can only be 2 integers
+            if(value_2 == 0):
+                self.write_error("Zero division\n")
+                sys.exit(57)
+            result = int(int(value_1) / int(value_2))                 # save and round the result
+            self.insert_to_frame(arg1, result)
+        else:
+            self.write_error("Invalid operand types\n")
+            sys.exit(53)
+        self.counter = self.counter + 1
+
+    # LT <var> <symb> <symb> - carries out 'less than' operation for 2 operands
+    def execute_lt(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        value_1 = self.get_argument_value(arg2)
+        value_2 = self.get_argument_value(arg3)
+        if(arg1.checked):
             self.check_variable_existence(arg1)
 
-            if(type(value_1) != type(value_2)):
-                sys.stderr.write("Invalid operand types\n")
-                sys.exit(53)
+        if(type(value_1) != type(value_2)):
+            self.write_error("Invalid operand types\n")
+            sys.exit(53)
 
-            if(isinstance(value_1, int) or isinstance(value_1, bool) or isinstance(value_1, str)):
-                result = value_1<value_2                    # save the result
-            else:
-                sys.stderr.write("Invalid operand types\n")
-                sys.exit(53)
-            self.insert_to_frame(arg1.name, arg1.frame, result)
-            self.counter = self.counter + 1
-        # GT <var> <symb> <symb>
-        elif(current_opcode == "GT"):                       # carries out 'greater than' operation for 2 operands
-            value_1 = self.get_argument_value(arg2)
-            value_2 = self.get_argument_value(arg3)
+        if(isinstance(value_1, int) or isinstance(value_1, bool) or isinstance(value_1, str)):
+            result = value_1<value_2                    # save the result
+        else:
+            self.write_error("Invalid operand types\n")
+            sys.exit(53)
+        self.insert_to_frame(arg1, result)
+        self.counter = self.counter + 1
+
+    # GT <var> <symb> <symb> - carries out 'greater than' operation for 2 operands
+    def execute_gt(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        value_1 = self.get_argument_value(arg2)
+        value_2 = self.get_argument_value(arg3)
+        if(arg1.checked):
             self.check_variable_existence(arg1)
 
-            if(type(value_1) != type(value_2)):
-                sys.stderr.write("Invalid operand types\n")
-                sys.exit(53)
+        if(type(value_1) != type(value_2)):
+            self.write_error("Invalid operand types\n")
+            sys.exit(53)
 
-            if(isinstance(value_1, int) or isinstance(value_1, bool) or isinstance(value_1, str)):
-                result = value_1>value_2                    # save the result
-            else:
-                sys.stderr.write("Invalid operand types\n")
-                sys.exit(53)
-            self.insert_to_frame(arg1.name, arg1.frame, result)
-            self.counter = self.counter + 1
-        # EQ <var> <symb> <symb>
-        elif(current_opcode == "EQ"):                       # carries out 'equal' operation for 2 operands
-            value_1 = self.get_argument_value(arg2)
-            value_2 = self.get_argument_value(arg3)
+        if(isinstance(value_1, int) or isinstance(value_1, bool) or isinstance(value_1, str)):
+            result = value_1>value_2                    # save the result
+        else:
+            self.write_error("Invalid operand types\n")
+            sys.exit(53)
+        self.insert_to_frame(arg1, result)
+        self.counter = self.counter + 1
+
+    # EQ <var> <symb> <symb> - carries out 'equal' operation for 2 operands
+    def execute_eq(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        value_1 = self.get_argument_value(arg2)
+        value_2 = self.get_argument_value(arg3)
+        if(arg1.checked):
             self.check_variable_existence(arg1)
 
-            if(value_1 != "nil" and value_2 != "nil"):
-                if(type(value_1) != type(value_2)):             # we can only compare 2 same types
-                    sys.stderr.write("Invalid operand types\n")
-                    sys.exit(53)
-            else:
-                if(value_1 == "nil"):
-                    value_1 = None
-                if(value_2 == "nil"):
-                    value_2 = None
-
-            if(isinstance(value_1, int) or isinstance(value_1, bool) or isinstance(value_1, str) or value_1 == None):
-                result = value_1 == value_2
-            else:
-                sys.stderr.write("Invalid operand types\n")
+        if(value_1 != "nil" and value_2 != "nil"):
+            if(type(value_1) != type(value_2)):             # we can only compare 2 same types
+                self.write_error("Invalid operand types\n")
                 sys.exit(53)
-            self.insert_to_frame(arg1.name, arg1.frame, result)
-            self.counter = self.counter + 1
-        # INT2CHAR <var> <symb>
-        elif(current_opcode == "INT2CHAR"):                 # converts unicode (integer) to char
-            value_1 = self.get_argument_value(arg2)
+        else:
+            if(value_1 == "nil"):
+                value_1 = None
+            if(value_2 == "nil"):
+                value_2 = None
+
+        if(isinstance(value_1, int) or isinstance(value_1, bool) or isinstance(value_1, str) or value_1 == None):
+            result = value_1 == value_2
+        else:
+            self.write_error("Invalid operand types\n")
+            sys.exit(53)
+        self.insert_to_frame(arg1, result)
+        self.counter = self.counter + 1
+
+    # INT2CHAR <var> <symb> - converts unicode (integer) to char
+    def execute_int2char(self, instruction):
+        arg1, arg2 = instruction.args
+        value_1 = self.get_argument_value(arg2)
+        if(arg1.checked):
             self.check_variable_existence(arg1)
 
-            if(arg2.type == "var"):                         # either variable with int
-                if(type(value_1) != int):
-                    sys.stderr.write("Invalid operand types\n")
-                    sys.exit(53)
-            elif(arg2.type != "int"):                       # or explicitly int
-                sys.stderr.write("Invalid operand types\n")
+        if(arg2.type == "var"):                         # either variable with int
+            if(type(value_1) != int):
+                self.write_error("Invalid operand types\n")
                 sys.exit(53)
+        elif(arg2.type != "int"):                       # or explicitly int
+            self.write_error("Invalid operand types\n")
+            sys.exit(53)
+
+        try:
+            new_char = chr(value_1)
+        except:
+            self.write_error("Invalid work with string\n")
+            sys.exit(58)
+        self.insert_to_frame(arg1, new_char)
+        self.counter = self.counter + 1
+
+    # STRI2INT <var> <symb> <symb> - get ordinal unicode (integer) number of a character from string at certain index
+    def execute_stri2int(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        string_value = self.get_argument_value(arg2, True)
+        index = self.get_argument_value(arg3)
+        if(arg1.checked):
+            self.check_variable_existence(arg1)
 
+        if(isinstance(string_value, string_types) and isinstance(index, int)):   # first must be string, second one integer
             try:
-                new_char = chr(value_1)
+                value = ord(string_value[index])
             except:
-                sys.stderr.write("Invalid work with string\n")
+                self.write_error("Invalid work with string\n")
                 sys.exit(58)
-            self.insert_to_frame(arg1.name, arg1.frame, new_char)
-            self.counter = self.counter + 1
-        # STRI2INT <var> <symb> <symb>
-        elif(current_opcode == "STRI2INT"):                 # get ordinal unicode (integer) number of a character from string at certain index
-            string_value = self.get_argument_value(arg2)
-            index = self.get_argument_value(arg3)
-            self.check_variable_existence(arg1)
+            self.insert_to_frame(arg1, value)
+        else:
+            self.write_error("Mismatch of types\n")
+            sys.exit(53)
+        self.counter = self.counter + 1
+
+    # CONCAT <var> <symb> <symb> - concatenates 2 strings
+    def execute_concat(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        # appending to the string in the same variable, the buffer grows in place
+        if(self.string_buffers and arg2.type == "var" and arg2.frame == arg1.frame and arg2.slot == arg1.slot):
+            string = self.peek(arg1)
+            value_2 = self.peek(arg3)
+            if(type(value_2) is StringBuffer):
+                value_2 = value_2.value()
+            if(type(value_2) is str):
+                if(type(string) is StringBuffer):
+                    string.append(value_2)
+                    self.counter = self.counter + 1
+                    return
+                elif(type(string) is str):
+                    string = StringBuffer(string)
+                    string.append(value_2)
+                    self.insert_to_frame(arg1, string)
+                    self.counter = self.counter + 1
+                    return
 
-            if(isinstance(string_value, str) and isinstance(index, int)):   # first must be string, second one integer
-                try:
-                    value = ord(string_value[index])
-                except:
-                    sys.stderr.write("Invalid work with string\n")
-                    sys.exit(58)
-                self.insert_to_frame(arg1.name, arg1.frame, value)
-            else:
-                sys.stderr.write("Mismatch of types\n")
-                sys.exit(53)
-            self.counter = self.counter + 1
-        # CONCAT <var> <symb> <symb>
-        elif(current_opcode == "CONCAT"):                   # concatenates 2 strings
-            self.can_miss_value = False
-            value_1 = self.get_argument_value(arg2)
-            value_2 = self.get_argument_value(arg3)
-            self.can_miss_value = True
+        self.can_miss_value = False
+        value_1 = self.get_argument_value(arg2)
+        value_2 = self.get_argument_value(arg3)
+        self.can_miss_value = True
+        if(arg1.checked):
             self.check_variable_existence(arg1)
 
-            if(arg2.type == "var"):
+        if(arg2.type == "var"):
+            if(arg2.checked):
                 self.check_variable_existence(arg2)
-                if(value_1 == None):
-                    sys.stderr.write("Invalid work with strings\n")
-                    sys.exit(56)
+            if(value_1 == None):
+                self.write_error("Invalid work with strings\n")
+                sys.exit(56)
 
-            if(arg3.type == "var"):
+        if(arg3.type == "var"):
+            if(arg3.checked):
                 self.check_variable_existence(arg3)
-                if(value_2 == None):
-                    sys.stderr.write("Invalid work with strings\n")
-                    sys.exit(56)
+            if(value_2 == None):
+                self.write_error("Invalid work with strings\n")
+                sys.exit(56)
 
-            if(isinstance(value_1, str) and isinstance(value_2, str)):  # both must be string to begin with
-                new_string = value_1 + value_2
-            elif(value_1 == None and isinstance(value_2, str)):         # it can also be empty
-                new_string = value_2
-            elif(value_2 == None and isinstance(value_1, str)):
-                new_string = value_1
-            else:
-                sys.stderr.write("Mismatch of types\n")
-                sys.exit(53)
-            self.insert_to_frame(arg1.name, arg1.frame, new_string)
-            self.counter = self.counter + 1
-        # STRLEN <var> <symb>
-        elif(current_opcode == "STRLEN"):                   # get length of the string and saves it into a variable
-            string = self.get_argument_value(arg2)
+        if(isinstance(value_1, str) and isinstance(value_2, str)):  # both must be string to begin with
+            new_string = value_1 + value_2
+        elif(value_1 == None and isinstance(value_2, str)):         # it can also be empty
+            new_string = value_2
+        elif(value_2 == None and isinstance(value_1, str)):
+            new_string = value_1
+        else:
+            self.write_error("Mismatch of types\n")
+            sys.exit(53)
+        self.insert_to_frame(arg1, new_string)
+        self.counter = self.counter + 1
+
+    # STRLEN <var> <symb> - get length of the string and saves it into a variable
+    def execute_strlen(self, instruction):
+        arg1, arg2 = instruction.args
+        string = self.get_argument_value(arg2, True)
+        if(arg1.checked):
             self.check_variable_existence(arg1)
 
-            if(isinstance(string, str)):                    # it must be string
-                string = self.replace_decimal_escapes(string)
-                length = len(string)
-            elif(string == None):
-                length = 0
-            else:
-                sys.stderr.write("Mismatch of types\n")
-                sys.exit(53)
-            self.insert_to_frame(arg1.name, arg1.frame, length)
-            self.counter = self.counter + 1
-        # GETCHAR <var> <symb> <symb>
-        elif(current_opcode == "GETCHAR"):                  # get character from specific index of a string
-            string = self.get_argument_value(arg2)
-            index = self.get_argument_value(arg3)
+        if(isinstance(string, string_types)):           # it must be string
+            length = len(string)
+        elif(string == None):
+            length = 0
+        else:
+            self.write_error("Mismatch of types\n")
+            sys.exit(53)
+        self.insert_to_frame(arg1, length)
+        self.counter = self.counter + 1
+
+    # GETCHAR <var> <symb> <symb> - get character from specific index of a string
+    def execute_getchar(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        string = self.get_argument_value(arg2, True)
+        index = self.get_argument_value(arg3)
+        if(arg1.checked):
             self.check_variable_existence(arg1)
 
-            if(isinstance(string, str) and isinstance(index, int)): # one must be string, the other one is integer
-                try:
-                    char = string[index]
-                except:
-                    sys.stderr.write("Invalid work with string\n")
-                    sys.exit(58)
-            else:
-                sys.exit(53)
-            self.insert_to_frame(arg1.name, arg1.frame, char)
-            self.counter = self.counter + 1
-        # SETCHAR <var> <symb> <symb>
-        elif(current_opcode == "SETCHAR"):              # sets certain character of a string to given character
-            self.check_variable_existence(arg1)
-            self.can_miss_value = False
-            string = self.get_argument_value(arg1)
-            index = self.get_argument_value(arg2)
-            char = self.get_argument_value(arg3)
-            self.can_miss_value = True
-
-            if(string == None or index == None or char == None):
-                sys.stderr.write("Invalid work with string\n")
+        if(isinstance(string, string_types) and isinstance(index, int)): # one must be string, the other one is integer
+            try:
+                char = string[index]
+            except:
+                self.write_error("Invalid work with string\n")
                 sys.exit(58)
+        else:
+            sys.exit(53)
+        self.insert_to_frame(arg1, char)
+        self.counter = self.counter + 1
+
+    # SETCHAR <var> <symb> <symb> - sets certain character of a string to given character
+    def execute_setchar(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        if(arg1.checked):
+            self.check_variable_existence(arg1)
+        self.can_miss_value = False
+        string = self.get_argument_value(arg1, True)
+        index = self.get_argument_value(arg2)
+        char = self.get_argument_value(arg3)
+        self.can_miss_value = True
 
-            if(type(index) != int):                     # index must be a number
-                sys.stderr.write("Mismatch of types\n")
-                sys.exit(53)
+        if(string == None or index == None or char == None or char == ""):
+            self.write_error("Invalid work with string\n")
+            sys.exit(58)
+
+        if(type(index) != int):                     # index must be a number
+            self.write_error("Mismatch of types\n")
+            sys.exit(53)
 
-            if(isinstance(string, str) and string != None):     # check for correct types and their values
-                if(isinstance(char, str) and char != ""):
-                    try:
-                        char = char[0]
+        if(isinstance(string, string_types) and string != None):    # check for correct types and their values
+            if(isinstance(char, str) and char != ""):
+                try:
+                    char = char[0]
+                    if(type(string) is StringBuffer):     # the character is replaced in place
+                        string.replace(index, char)
+                    elif(self.string_buffers):
+                        string = StringBuffer(string)
+                        string.replace(index, char)
+                    else:
                         string = list(string)
                         string[index] = char
                         string = "".join(string)
-                    except:
-                        sys.stderr.write("Invalid work with string\n")
-                        sys.exit(58)
-                else:
-                    sys.stderr.write("Mismatch of types\n")
-                    sys.exit(53)
+                except:
+                    self.write_error("Invalid work with string\n")
+                    sys.exit(58)
             else:
-                sys.stderr.write("Mismatch of types\n")
+                self.write_error("Mismatch of types\n")
                 sys.exit(53)
-            self.insert_to_frame(arg1.name, arg1.frame, string)
-            self.counter = self.counter + 1
-        # TYPE <var> <symb>
-        elif(current_opcode == "TYPE"):                 # gets type of a variables or constant and saves it to variable
+        else:
+            self.write_error("Mismatch of types\n")
+            sys.exit(53)
+        self.insert_to_frame(arg1, string)
+        self.counter = self.counter + 1
+
+    # TYPE <var> <symb> - gets type of a variables or constant and saves it to variable
+    def execute_type(self, instruction):
+        arg1, arg2 = instruction.args
+        if(arg1.checked):
             self.check_variable_existence(arg1)
-            variable = self.get_argument_value(arg2)
-            if(type(variable) is int):
-                self.insert_to_frame(arg1.name, arg1.frame, "int")
-            elif(type(variable) is str):
-                if(variable == "nil"):
-                    self.insert_to_frame(arg1.name, arg1.frame, "nil")
-                else:
-                    self.insert_to_frame(arg1.name, arg1.frame, "string")
-            elif(type(variable) is bool):
-                self.insert_to_frame(arg1.name, arg1.frame, "bool")
-            elif(variable == None):
-                self.insert_to_frame(arg1.name, arg1.frame, "nil")
-            else:
-                sys.exit(53)
-            self.counter = self.counter + 1
-        # DPRINT <symb>
-        elif(current_opcode == "DPRINT"):           # debug print
-            exit_code = self.get_argument_value(arg1)
-            sys.stderr.write(exit_code)
-        # BREAK
-        elif(current_opcode == "BREAK"):            # writes current information 
-            sys.stderr.write("Currently carrying out " + str(op_num) + ". instruction\n")
-            sys.stderr.write("Global frame contains " + str(self.global_frame) + "\n")
-            sys.stderr.write("There is/are " + str(len(self.local_frames)) + " local frames\n")
-            if(len(self.local_frames) != 0):
-                sys.stderr.write("Top local frame contains " + str(self.local_frames[len(self.local_frames) - 1]) + "\n")
-            try:
-                sys.stderr.write("Temporary frame contains " + str(self.temporary_frame) + "\n")
-            except:
-                sys.stderr.write("Temporary frame doesn't exist\n")
-            self.counter = self.counter + 1
-        # EXIT <symb>
-        elif(current_opcode == "EXIT"):         # exits with given exit code
-            exit_code = int(self.get_argument_value(arg1))
-            if(arg1.type == "int" or arg1.type == "var"):             # type must be integer
-                if(exit_code >=0 and exit_code <= 49):
-                    sys.exit(exit_code)
-                else:
-                    sys.stderr.write("Invalid exit code\n")
-                    sys.exit(57)
-            else:
-                sys.stderr.write("Invalid type of exit code\n")
-                sys.exit(53)
-            self.counter = self.counter + 1
-        # JUMP <label>
-        elif(current_opcode == "JUMP"):         # gets jump destination and changes counter to it
-            label = self.get_argument_value(arg1)
-            try:
-                jump_destination = self.labels[label]
-                self.counter = int(jump_destination)
-            except:
-                sys.stderr.write("Invalid jump destination\n")
-                sys.exit(52)
-
-        # LABEL <label>
-        elif(current_opcode == "LABEL"):
-            self.counter = self.counter + 1 # just changes the counter because the labels are already saved
-        # JUMPIFEQ <label> <symb> <symb>
-        elif(current_opcode == "JUMPIFEQ"):
-            label = self.get_argument_value(arg1)
-            self.can_miss_value = False
-            value_1 = self.get_argument_value(arg2)
-            value_2 = self.get_argument_value(arg3)
-            self.can_miss_value = True
-
-            if(value_1 != "nil" and value_2 != "nil"):
-                if(type(value_1) != type(value_2)): # must be the same type
-                    sys.stderr.write("Mismatch of types\n")
-                    sys.exit(53)
+        variable = self.get_argument_value(arg2)
+        if(type(variable) is int):
+            self.insert_to_frame(arg1, "int")
+        elif(type(variable) is str):
+            if(variable == "nil"):
+                self.insert_to_frame(arg1, "nil")
             else:
-                if(value_1 == "nil"):
-                    value_1 = None
-                if(value_2 == "nil"):
-                    value_2 = None
-            if(isinstance(value_1, int) or isinstance(value_1, bool) or isinstance(value_1, str) or value_1 == None):
-                if(value_1 == value_2):             # must be the same value to jump
-                    jump_destination = self.labels[label]
-                    self.counter = int(jump_destination)
-                else:
-                    self.counter = self.counter + 1
+                self.insert_to_frame(arg1, "string")
+        elif(type(variable) is bool):
+            self.insert_to_frame(arg1, "bool")
+        elif(variable == None):
+            self.insert_to_frame(arg1, "nil")
+        else:
+            sys.exit(53)
+        self.counter = self.counter + 1
+
+    # DPRINT <symb> - debug print
+    def execute_dprint(self, instruction):
+        arg1 = instruction.args[0]
+        value = self.get_argument_value(arg1)
+        self.output.flush()             # keep order with the program output
+        sys.stderr.write(str(value))
+        self.counter = self.counter + 1
+
+    # BREAK - writes current information
+    def execute_break(self, instruction):
+        self.output.flush()             # keep order with the program output
+        sys.stderr.write("Currently carrying out " + str(instruction.order) + ". instruction\n")
+        sys.stderr.write("Global frame contains " + str(self.frame_contents(self.global_frame, self.global_names)) + "\n")
+        sys.stderr.write("There is/are " + str(len(self.local_frames)) + " local frames\n")
+        if(len(self.local_frames) != 0):
+            sys.stderr.write("Top local frame contains " + str(self.frame_contents(self.local_frames[-1], self.frame_names)) + "\n")
+        if(self.temporary_frame != None):
+            sys.stderr.write("Temporary frame contains " + str(self.frame_contents(self.temporary_frame, self.frame_names)) + "\n")
+        else:
+            sys.stderr.write("Temporary frame doesn't exist\n")
+        sys.stderr.write("Data stack contains " + str(len(self.data_stack)) + " values, at most " + str(self.stack_peak) + "\n")
+        self.counter = self.counter + 1
+
+    # EXIT <symb> - exits with given exit code
+    def execute_exit(self, instruction):
+        arg1 = instruction.args[0]
+        exit_code = int(self.get_argument_value(arg1))
+        if(arg1.type == "int" or arg1.type == "var"):             # type must be integer
+            if(exit_code >=0 and exit_code <= 49):
+                sys.exit(exit_code)
             else:
-                sys.stderr.write("Mismatch of types\n")
-                sys.exit(53)
-        # JUMPIFNEQ <label> <symb> <symb>
-        elif(current_opcode == "JUMPIFNEQ"):
-            label = self.get_argument_value(arg1)
-            value_1 = self.get_argument_value(arg2)
-            value_2 = self.get_argument_value(arg3)
+                self.write_error("Invalid exit code\n")
+                sys.exit(57)
+        else:
+            self.write_error("Invalid type of exit code\n")
+            sys.exit(53)
+        self.counter = self.counter + 1
+
+    # JUMP <label> - gets jump destination and changes counter to it
+    def execute_jump(self, instruction):
+        self.counter = instruction.args[0].value
+
+    # LABEL <label>
+    def execute_label(self, instruction):
+        self.counter = self.counter + 1 # just changes the counter because the labels are already saved
+
+    # JUMPIFEQ <label> <symb> <symb>
+    def execute_jumpifeq(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        self.can_miss_value = False
+        value_1 = self.get_argument_value(arg2)
+        value_2 = self.get_argument_value(arg3)
+        self.can_miss_value = True
 
+        if(value_1 != "nil" and value_2 != "nil"):
             if(type(value_1) != type(value_2)): # must be the same type
+                self.write_error("Mismatch of types\n")
                 sys.exit(53)
-
-            if(value_1 != value_2):             # must be different value to jump
-                jump_destination = self.labels[label]
-                self.counter = int(jump_destination)
+        else:
+            if(value_1 == "nil"):
+                value_1 = None
+            if(value_2 == "nil"):
+                value_2 = None
+        if(isinstance(value_1, int) or isinstance(value_1, bool) or isinstance(value_1, str) or value_1 == None):
+            if(value_1 == value_2):             # must be the same value to jump
+                self.counter = arg1.value
             else:
                 self.counter = self.counter + 1
-        # WRITE <symb>
-        elif(current_opcode == "WRITE"):
-            value = self.get_argument_value(arg1)
-            if(type(value) == bool):
-                if(value == True):
-                    value = "true"
-                else:
-                    value = "false"
-            value = str(value)              # replaces string escapes and prints it out
-            value = self.replace_decimal_escapes(value)
-            print(value, end='', flush=True)
+        else:
+            self.write_error("Mismatch of types\n")
+            sys.exit(53)
+
+    # JUMPIFNEQ <label> <symb> <symb>
+    def execute_jumpifneq(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        value_1 = self.get_argument_value(arg2)
+        value_2 = self.get_argument_value(arg3)
+
+        if(type(value_1) != type(value_2)): # must be the same type
+            sys.exit(53)
+
+        if(value_1 != value_2):             # must be different value to jump
+            self.counter = arg1.value
+        else:
             self.counter = self.counter + 1
-        # CALL <label>
-        elif(current_opcode == "CALL"):         # calls certain value
-            label = self.get_argument_value(arg1)
-            if(type(label) == int):
-                sys.stderr.write("Invalid call type\n")
-                sys.exit(32)
-            try:
-                jump_destination = self.labels[label]
-                self.call_stack.append(self.counter + 1)  # when you come back, jump right after label
-                #print("My jump destination is " + str(jump_destination))
-                self.counter = jump_destination
-                
-            except:
-                sys.stderr.write("Invalid call\n")
-                sys.exit(52)
-        # RETURN
-        elif(current_opcode == "RETURN"):
-            try:
-                self.counter = self.call_stack[len(self.call_stack) - 1]    # gets new destination where to return
-                del self.call_stack[-1]
-            except:
-                sys.stderr.write("Missing return destination\n")
-                sys.exit(56)
-        # AND <var> <symb> <symb>
-        elif(current_opcode == "AND"):          # carries out operation AND for 2 oeprands
-            value_1 = self.get_argument_value(arg2)
-            value_2 = self.get_argument_value(arg3)
-            self.check_variable_existence(arg1)
 
-            if(type(value_1) == bool and type(value_2) == bool):
-                result = (value_1 and value_2)
-                self.insert_to_frame(arg1.name, arg1.frame, result)
+    # WRITE <symb>
+    def execute_write(self, instruction):
+        arg1 = instruction.args[0]
+        value = self.get_argument_value(arg1)
+        self.write_value(value)
+        self.counter = self.counter + 1
+
+    # prints out value in its IPPcode19 form
+    def write_value(self, value):
+        if(type(value) == bool):
+            if(value == True):
+                value = "true"
             else:
-                sys.stderr.write("Mismatch of types\n")
-                sys.exit(53)
-            self.counter = self.counter + 1
-        # OR <var> <symb> <symb>
-        elif(current_opcode == "OR"):           # carries out operation OR for 2 oeprands
-            value_1 = self.get_argument_value(arg2)
-            value_2 = self.get_argument_value(arg3)
+                value = "false"
+        self.output.write(str(value))   # strings are already decoded
+
+    # CALL <label> - calls certain value
+    def execute_call(self, instruction):
+        self.call_stack.append(self.counter + 1)  # when you come back, jump right after call
+        self.counter = instruction.args[0].value
+
+    # RETURN
+    def execute_return(self, instruction):
+        try:
+            self.counter = self.call_stack[len(self.call_stack) - 1]    # gets new destination where to return
+            del self.call_stack[-1]
+        except:
+            self.write_error("Missing return destination\n")
+            sys.exit(56)
+
+    # AND <var> <symb> <symb> - carries out operation AND for 2 oeprands
+    def execute_and(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        value_1 = self.get_argument_value(arg2)
+        value_2 = self.get_argument_value(arg3)
+        if(arg1.checked):
             self.check_variable_existence(arg1)
 
-            if(type(value_1) == bool and type(value_2) == bool):
-                result = (value_1 or value_2)
-                self.insert_to_frame(arg1.name, arg1.frame, result)
-            else:
-                sys.stderr.write("Mismatch of types\n")
-                sys.exit(53)
-            self.counter = self.counter + 1
-        # NOT <var> <symb>
-        elif(current_opcode == "NOT"):      # carries out operation NOT for 1 operand
-            value_1 = self.get_argument_value(arg2)
+        if(type(value_1) == bool and type(value_2) == bool):
+            result = (value_1 and value_2)
+            self.insert_to_frame(arg1, result)
+        else:
+            self.write_error("Mismatch of types\n")
+            sys.exit(53)
+        self.counter = self.counter + 1
+
+    # OR <var> <symb> <symb> - carries out operation OR for 2 oeprands
+    def execute_or(self, instruction):
+        arg1, arg2, arg3 = instruction.args
+        value_1 = self.get_argument_value(arg2)
+        value_2 = self.get_argument_value(arg3)
+        if(arg1.checked):
             self.check_variable_existence(arg1)
 
-            if(type(value_1) == bool):
-                result = not value_1
-                self.insert_to_frame(arg1.name, arg1.frame, result)
-            else:
-                sys.stderr.write("Mismatch of types\n")
-                sys.exit(53)
-            self.counter = self.counter + 1
-        # READ <var> <type>
-        elif(current_opcode == "READ"):
+        if(type(value_1) == bool and type(value_2) == bool):
+            result = (value_1 or value_2)
+            self.insert_to_frame(arg1, result)
+        else:
+            self.write_error("Mismatch of types\n")
+            sys.exit(53)
+        self.counter = self.counter + 1
+
+    # NOT <var> <symb> - carries out operation NOT for 1 operand
+    def execute_not(self, instruction):
+        arg1, arg2 = instruction.args
+        value_1 = self.get_argument_value(arg2)
+        if(arg1.checked):
             self.check_variable_existence(arg1)
-            
-            if(self.arg.input):         # gets input from file
-                line = self.arg.i_f.readline()
-                try:
-                    if(line[len(line) - 1] == '\n'):
-                        line = line[:-1]
-                    if(arg2.value == "bool"):
-                        line = line.lower()
-                        if(line == "true"):
-                            line = True
-                        elif(line == "false"):
-                            line = False
-                        else:
-                            line = False
-                    elif(arg2.value == "int"):
-                        line = self.check_number(line)
-                    elif(arg2.value == "string"):
-                        if(isinstance(line, str)):
-                            pass
-                        else:
-                            line = ""
-                    elif(arg2.value == "nil"):
-                        sys.stderr.write("Invalid XML file\n")
-                        sys.exit(32)
-                    else:
-                        sys.stderr.write("Invalid operand types\n")
-                        sys.exit(53)
-                except:
-                    if(arg2.value == "bool"):
-                        line = False
-                    elif(arg2.value == "int"):
-                        line = 0
-                    elif(arg2.value == "string"):
-                        line = ""
-                    elif(arg2.value == "nil"):
-                        sys.stderr.write("Invalid XML file\n")
-                        sys.exit(32)
-                    else:
-                        sys.stderr.write("Invalid operand types\n")
-                        sys.exit(53)
-            else:                   # gets input form the user
-                line = input()
+
+        if(type(value_1) == bool):
+            result = not value_1
+            self.insert_to_frame(arg1, result)
+        else:
+            self.write_error("Mismatch of types\n")
+            sys.exit(53)
+        self.counter = self.counter + 1
+
+    # READ <var> <type>
+    def execute_read(self, instruction):
+        arg1, arg2 = instruction.args
+        if(arg1.checked):
+            self.check_variable_existence(arg1)
+        
+        if(self.arg.input):         # gets input from file
+            line = self.arg.i_f.readline()
+            try:
+                if(line[len(line) - 1] == '\n'):
+                    line = line[:-1]
                 if(arg2.value == "bool"):
                     line = line.lower()
                     if(line == "true"):
@@ -1057,307 +1820,1826 @@ class Interpret:
                     else:
                         line = False
                 elif(arg2.value == "int"):
-                    if(line.isdigit()):
-                        line = int(line)
-                    else:
-                        line = 0
+                    line = self.check_number(line)     # invalid integer is read as 0
                 elif(arg2.value == "string"):
                     if(isinstance(line, str)):
                         pass
                     else:
                         line = ""
                 elif(arg2.value == "nil"):
-                    sys.stderr.write("Invalid XML file\n")
+                    self.write_error("Invalid XML file\n")
                     sys.exit(32)
                 else:
-                    sys.stderr.write("Invalid operand types\n")
+                    self.write_error("Invalid operand types\n")
                     sys.exit(53)
-            self.insert_to_frame(arg1.name, arg1.frame, line)
-            self.counter = self.counter + 1
-        #
-        #       STACK FUNCTIONS
-        # 
-        # CLEARS
-        elif(current_opcode == "CLEARS"):
-            self.data_stack = []            # clears the data stack
-            self.counter = self.counter + 1
-        # ADDS
-        elif(current_opcode == "ADDS"):     # adds 2 integers from data stack
-            self.chceck_available_data_stack(2)
-            first_op = self.data_stack[len(self.data_stack) - 1]
-            second_op = self.data_stack[len(self.data_stack) - 2]
-
-            if((not isinstance(first_op, int)) or (not isinstance(second_op, int))):
-                sys.stderr.write("Invalid types\n")
+            except:
+                if(arg2.value == "bool"):
+                    line = False
+                elif(arg2.value == "int"):
+                    line = 0
+                elif(arg2.value == "string"):
+                    line = ""
+                elif(arg2.value == "nil"):
+                    self.write_error("Invalid XML file\n")
+                    sys.exit(32)
+                else:
+                    self.write_error("Invalid operand types\n")
+                    sys.exit(53)
+        else:                   # gets input form the user
+            if(self.interactive):   # user has to see everything before answering
+                self.output.flush()
+            line = input()
+            if(arg2.value == "bool"):
+                line = line.lower()
+                if(line == "true"):
+                    line = True
+                elif(line == "false"):
+                    line = False
+                else:
+                    line = False
+            elif(arg2.value == "int"):
+                if(line.isdigit()):
+                    line = int(line)
+                else:
+                    line = 0
+            elif(arg2.value == "string"):
+                if(isinstance(line, str)):
+                    pass
+                else:
+                    line = ""
+            elif(arg2.value == "nil"):
+                self.write_error("Invalid XML file\n")
+                sys.exit(32)
+            else:
+                self.write_error("Invalid operand types\n")
                 sys.exit(53)
-
-            addition = first_op + second_op
-            self.remove_from_stack(2)
-            self.data_stack.append(addition)    # push it to data stack
-            self.counter = self.counter + 1
-        # SUBS
-        elif(current_opcode == "SUBS"):     # subtracts 2 integers from data stack
+        self.insert_to_frame(arg1, line)
+        self.counter = self.counter + 1
+
+    #
+    #       STACK FUNCTIONS
+    #
+    # CLEARS
+    def execute_clears(self, instruction):
+        self.data_stack.clear()         # clears the data stack
+        self.counter = self.counter + 1
+
+    # ADDS - adds 2 integers from data stack
+    def execute_adds(self, instruction):
+        if(instruction.checks_stack):
             self.chceck_available_data_stack(2)
-            second_op = self.data_stack[len(self.data_stack) - 1]
-            first_op = self.data_stack[len(self.data_stack) - 2]
-            if((not isinstance(first_op, int)) or (not isinstance(second_op, int))):
-                sys.stderr.write("Invalid types\n")
-                sys.exit(53)
+        first_op = self.data_stack.pop()
+        second_op = self.data_stack.pop()
 
-            subtraction = first_op - second_op
-            self.remove_from_stack(2)
-            self.data_stack.append(subtraction) # push it to data stack
-            self.counter = self.counter + 1
-        # MULS
-        elif(current_opcode == "MULS"):     # multiply 2 integers from data stack
-            self.chceck_available_data_stack(2)
-            first_op = self.data_stack[len(self.data_stack) - 1]
-            second_op = self.data_stack[len(self.data_stack) - 2]
-            if(type(first_op) == bool or type(second_op) == bool):
-                sys.stderr.write("Invalid types\n")
-                sys.exit(53)
+        if((not isinstance(first_op, int)) or (not isinstance(second_op, int))):
+            self.write_error("Invalid types\n")
+            sys.exit(53)
 
-            if((not isinstance(first_op, int)) or (not isinstance(second_op, int))):
-                sys.stderr.write("Invalid types\n")
-                sys.exit(53)
+        addition = first_op + second_op
+        self.data_stack.append(addition)    # push it to data stack
+        self.counter = self.counter + 1
 
-            multiplication = first_op * second_op
-            self.remove_from_stack(2)
-            self.data_stack.append(multiplication)  # push it to data stack
-            self.counter = self.counter + 1
-        # IDIVS
-        elif(current_opcode == "IDIVS"):    # divides 2 integers from data stack
+    # SUBS - subtracts 2 integers from data stack
+    def execute_subs(self, instruction):
+        if(instruction.checks_stack):
             self.chceck_available_data_stack(2)
-            second_op = self.data_stack[len(self.data_stack) - 1]
-            first_op = self.data_stack[len(self.data_stack) - 2]
-            if((not isinstance(first_op, int)) or (not isinstance(second_op, int))):
-                sys.stderr.write("Invalid types\n")
-                sys.exit(53)
+        second_op = self.data_stack.pop()
+        first_op = self.data_stack.pop()
+        if((not isinstance(first_op, int)) or (not isinstance(second_op, int))):
+            self.write_error("Invalid types\n")
+            sys.exit(53)
+
+        subtraction = first_op - second_op
+        self.data_stack.append(subtraction) # push it to data stack
+        self.counter = self.counter + 1
+
+    # MULS - multiply 2 integers from data stack
+    def execute_muls(self, instruction):
+        if(instruction.checks_stack):
+            self.chceck_available_data_stack(2)
+        first_op = self.data_stack.pop()
+        second_op = self.data_stack.pop()
+        if(type(first_op) == bool or type(second_op) == bool):
+            self.write_error("Invalid types\n")
+            sys.exit(53)
+
+        if((not isinstance(first_op, int)) or (not isinstance(second_op, int))):
+            self.write_error("Invalid types\n")
+            sys.exit(53)
+
+        multiplication = first_op * second_op
+        self.data_stack.append(multiplication)  # push it to data stack
+        self.counter = self.counter + 1
+
+    # IDIVS - divides 2 integers from data stack
+    def execute_idivs(self, instruction):
+        if(instruction.checks_stack):
+            self.chceck_available_data_stack(2)
+        second_op = self.data_stack.pop()
+        first_op = self.data_stack.pop()
+        if((not isinstance(first_op, int)) or (not isinstance(second_op, int))):
+            self.write_error("Invalid types\n")
+            sys.exit(53)
+
+        if(second_op == 0):             # check for zero division
+            self.write_error("Zero division\n")
+            sys.exit(57)
+        division = int(first_op / second_op)
+        self.data_stack.append(division)    # push it to data stack
+        self.counter = self.counter + 1
+
+    # LTS - carries out 'less than' operation for 2 operands on data stack
+    def execute_lts(self, instruction):
+        if(instruction.checks_stack):
+            self.chceck_available_data_stack(2)
+        second_op = self.data_stack.pop()
+        first_op = self.data_stack.pop()
+        if(type(first_op) != type(second_op)):
+            sys.exit(53)
+        if(isinstance(first_op, int) or isinstance(first_op, bool) or isinstance(first_op, str)):
+            self.data_stack.append(first_op < second_op)    # push it to data stack
+        else:
+            self.write_error("Invalid types\n")
+            sys.exit(53)
+        self.counter = self.counter + 1
 
-            if(second_op == 0):             # check for zero division
-                sys.stderr.write("Zero division\n")
-                sys.exit(57)
-            division = int(first_op / second_op)
-            self.remove_from_stack(2)
-            self.data_stack.append(division)    # push it to data stack
-            self.counter = self.counter + 1
-        # LTS
-        elif(current_opcode == "LTS"):  # carries out 'less than' operation for 2 operands on data stack
+    # GTS - carries out 'greater than' operation for 2 operands on data stack
+    def execute_gts(self, instruction):
+        if(instruction.checks_stack):
             self.chceck_available_data_stack(2)
-            second_op = self.data_stack[len(self.data_stack) - 1]
-            first_op = self.data_stack[len(self.data_stack) - 2]
-            self.remove_from_stack(2)
-            if(type(first_op) != type(second_op)):
-                sys.exit(53)
-            if(isinstance(first_op, int) or isinstance(first_op, bool) or isinstance(first_op, str)):
-                self.data_stack.append(first_op < second_op)    # push it to data stack
-            else:
-                sys.stderr.write("Invalid types\n")
-                sys.exit(53)
-            self.counter = self.counter + 1
-        # GTS
-        elif(current_opcode == "GTS"):  # carries out 'greater than' operation for 2 operands on data stack
+        second_op = self.data_stack.pop()
+        first_op = self.data_stack.pop()
+        if(type(first_op) != type(second_op)):
+            self.write_error("Invalid types\n")
+            sys.exit(53)
+        if(isinstance(first_op, int) or isinstance(first_op, bool) or isinstance(first_op, str)):
+            self.data_stack.append(first_op > second_op)    # push it to data stack
+        else:
+            self.write_error("Invalid types\n")
+            sys.exit(53)
+        self.counter = self.counter + 1
+
+    # EQS - carries out 'equal' operation for 2 operands on data stack
+    def execute_eqs(self, instruction):
+        if(instruction.checks_stack):
             self.chceck_available_data_stack(2)
-            second_op = self.data_stack[len(self.data_stack) - 1]
-            first_op = self.data_stack[len(self.data_stack) - 2]
-            self.remove_from_stack(2)
+        first_op = self.data_stack.pop()
+        second_op = self.data_stack.pop()
+
+        if(first_op != "nil" and second_op != "nil"):
             if(type(first_op) != type(second_op)):
-                sys.stderr.write("Invalid types\n")
+                self.write_error("Invalid operand types\n")
                 sys.exit(53)
-            if(isinstance(first_op, int) or isinstance(first_op, bool) or isinstance(first_op, str)):
-                self.data_stack.append(first_op > second_op)    # push it to data stack
-            else:
-                sys.stderr.write("Invalid types\n")
-                sys.exit(53)
-            self.counter = self.counter + 1
-        # EQS
-        elif(current_opcode == "EQS"):  # carries out 'equal' operation for 2 operands on data stack
-            self.chceck_available_data_stack(2)
-            first_op = self.data_stack[len(self.data_stack) - 1]
-            second_op = self.data_stack[len(self.data_stack) - 2]
-            self.remove_from_stack(2)
+        else:
+            if(first_op == "nil"):
+                first_op = None
+            if(second_op == "nil"):
+                second_op = None
 
-            if(first_op != "nil" and second_op != "nil"):
-                if(type(first_op) != type(second_op)):
-                    sys.stderr.write("Invalid operand types\n")
-                    sys.exit(53)
-            else:
-                if(first_op == "nil"):
-                    first_op = None
-                if(second_op == "nil"):
-                    second_op = None
+        if(isinstance(first_op, int) or isinstance(first_op, bool) or isinstance(first_op, str) or first_op == None):
+            self.data_stack.append(first_op == second_op)   # push it to data stack
+        else:
+            self.write_error("Invalid types\n")
+            sys.exit(53)
+        self.counter = self.counter + 1
 
-            if(isinstance(first_op, int) or isinstance(first_op, bool) or isinstance(first_op, str) or first_op == None):
-                self.data_stack.append(first_op == second_op)   # push it to data stack
-            else:
-                sys.stderr.write("Invalid types\n")
-                sys.exit(53)
-            self.counter = self.counter + 1
-        # ANDS
-        elif(current_opcode == "ANDS"): # carries out 'equal' operation for 2 operands on data stack
+    # ANDS - carries out 'equal' operation for 2 operands on data stack
+    def execute_ands(self, instruction):
+        if(instruction.checks_stack):
             self.chceck_available_data_stack(2)
-            first_op = self.data_stack[len(self.data_stack) - 1]
-            second_op = self.data_stack[len(self.data_stack) - 2]
-            self.remove_from_stack(2)
-            if(type(first_op) == bool and type(second_op) == bool):
-                self.data_stack.append(first_op and second_op)  # push it to data stack
-            else:
-                sys.stderr.write("Invalid types\n")
-                sys.exit(53)
-            self.counter = self.counter + 1
-        # ORS
-        elif(current_opcode == "ORS"): # carries out 'or' operation for 2 operands on data stack
+        first_op = self.data_stack.pop()
+        second_op = self.data_stack.pop()
+        if(type(first_op) == bool and type(second_op) == bool):
+            self.data_stack.append(first_op and second_op)  # push it to data stack
+        else:
+            self.write_error("Invalid types\n")
+            sys.exit(53)
+        self.counter = self.counter + 1
+
+    # ORS - carries out 'or' operation for 2 operands on data stack
+    def execute_ors(self, instruction):
+        if(instruction.checks_stack):
             self.chceck_available_data_stack(2)
-            first_op = self.data_stack[len(self.data_stack) - 1]
-            second_op = self.data_stack[len(self.data_stack) - 2]
-            self.remove_from_stack(2)
-            if(type(first_op) == bool and type(second_op) == bool):
-                self.data_stack.append(first_op or second_op)   # push it to data stack
-            else:
-                sys.stderr.write("Invalid types\n")
-                sys.exit(53)
-            self.counter = self.counter + 1
-        # NOTS
-        elif(current_opcode == "NOTS"): # carries out 'or' operation for 1 operand on data stack
+        first_op = self.data_stack.pop()
+        second_op = self.data_stack.pop()
+        if(type(first_op) == bool and type(second_op) == bool):
+            self.data_stack.append(first_op or second_op)   # push it to data stack
+        else:
+            self.write_error("Invalid types\n")
+            sys.exit(53)
+        self.counter = self.counter + 1
+
+    # NOTS - carries out 'or' operation for 1 operand on data stack
+    def execute_nots(self, instruction):
+        if(instruction.checks_stack):
             self.chceck_available_data_stack(1)
-            first_op = self.data_stack[len(self.data_stack) - 1]
-            self.remove_from_stack(1)
-            if(type(first_op) == bool):
-                self.data_stack.append(not first_op)    # push it to data stack
-            else:
-                sys.stderr.write("Invalid types\n")
-                sys.exit(53)
-            self.counter = self.counter + 1
-        # INT2CHARS
-        elif(current_opcode == "INT2CHARS"):    # convert integer to character on data stack
+        first_op = self.data_stack.pop()
+        if(type(first_op) == bool):
+            self.data_stack.append(not first_op)    # push it to data stack
+        else:
+            self.write_error("Invalid types\n")
+            sys.exit(53)
+        self.counter = self.counter + 1
+
+    # INT2CHARS - convert integer to character on data stack
+    def execute_int2chars(self, instruction):
+        if(instruction.checks_stack):
             self.chceck_available_data_stack(1)
-            first_op = self.data_stack[len(self.data_stack) - 1]
-            self.remove_from_stack(1)
+        first_op = self.data_stack.pop()
+        try:
+            self.data_stack.append(chr(first_op))
+        except:
+            self.write_error("Invalid types\n")
+            sys.exit(58)
+        self.counter = self.counter + 1
+
+    # STRI2INTS - converts character of string at certain index to integer
+    def execute_stri2ints(self, instruction):
+        if(instruction.checks_stack):
+            self.chceck_available_data_stack(2)
+        first_op = self.data_stack.pop()
+        second_op = self.data_stack.pop()
+        if(isinstance(second_op, str) and isinstance(first_op, int)):
             try:
-                self.data_stack.append(chr(first_op))
+                self.data_stack.append(ord(second_op[first_op]))
             except:
-                sys.stderr.write("Invalid types\n")
+                self.write_error("Index out of bounds\n")
                 sys.exit(58)
-            self.counter = self.counter + 1
-        # STRI2INTS
-        elif(current_opcode == "STRI2INTS"):    # converts character of string at certain index to integer
-            self.chceck_available_data_stack(2)
-            first_op = self.data_stack[len(self.data_stack) - 1]
-            second_op = self.data_stack[len(self.data_stack) - 2]
-            self.remove_from_stack(2)
-            if(isinstance(second_op, str) and isinstance(first_op, int)):
-                try:
-                    self.data_stack.append(ord(second_op[first_op]))
-                except:
-                    sys.stderr.write("Index out of bounds\n")
-                    sys.exit(58)
-            else:
-                sys.stderr.write("Type mismatch\n")
-                sys.exit(53)
+        else:
+            self.write_error("Type mismatch\n")
+            sys.exit(53)
 
-            self.counter = self.counter + 1
-        # JUMPIFEQS
-        elif(current_opcode == "JUMPIFEQS"):    # jumps to given label if 2 top values at data stack are equal
-            label = self.get_argument_value(arg1)
-            self.chceck_available_data_stack(2)
-            first_op = self.data_stack[len(self.data_stack) - 1]
-            second_op = self.data_stack[len(self.data_stack) - 2]
-            self.remove_from_stack(2)
+        self.counter = self.counter + 1
 
-            if(first_op != "nil" and second_op != "nil"):
-                if(type(first_op) != type(second_op)):
-                    sys.stderr.write("Invalid types\n")
-                    sys.exit(53)
-            else:
-                if(first_op == "nil"):
-                    first_op = None
-                if(second_op == "nil"):
-                    second_op = None
-
-            if(isinstance(first_op, int) or isinstance(first_op, bool) or isinstance(first_op, str) or first_op == None):
-                if(first_op == second_op):
-                    jump_destination = self.labels[label]       # choose the jump destination
-                    self.counter = int(jump_destination)
-                else:
-                    self.counter = self.counter + 1
-            else:
-                sys.stderr.write("Mismatch of types\n")
-                sys.exit(53)
-        # JUMPIFNEQS
-        elif(current_opcode == "JUMPIFNEQS"):   # jumps to given label if 2 top values at data stack are not equal
-            label = self.get_argument_value(arg1)
+    # JUMPIFEQS - jumps to given label if 2 top values at data stack are equal
+    def execute_jumpifeqs(self, instruction):
+        arg1 = instruction.args[0]
+        if(instruction.checks_stack):
             self.chceck_available_data_stack(2)
-            first_op = self.data_stack[len(self.data_stack) - 1]
-            second_op = self.data_stack[len(self.data_stack) - 2]
-            self.remove_from_stack(2)
+        first_op = self.data_stack.pop()
+        second_op = self.data_stack.pop()
+
+        if(first_op != "nil" and second_op != "nil"):
             if(type(first_op) != type(second_op)):
-                sys.stderr.write("Invalid types\n")
+                self.write_error("Invalid types\n")
                 sys.exit(53)
-            if(first_op != second_op):
-                jump_destination = self.labels[label]       # choose the jump destination
-                self.counter = int(jump_destination)
+        else:
+            if(first_op == "nil"):
+                first_op = None
+            if(second_op == "nil"):
+                second_op = None
+
+        if(isinstance(first_op, int) or isinstance(first_op, bool) or isinstance(first_op, str) or first_op == None):
+            if(first_op == second_op):
+                self.counter = arg1.value       # jump to the destination
             else:
                 self.counter = self.counter + 1
+        else:
+            self.write_error("Mismatch of types\n")
+            sys.exit(53)
 
-        # statistics for instructions that were carried out
-        if(self.arg.stats and "--insts" in self.arg.stats_arg):
-            self.insts = self.insts + 1
-
-        # statistics for total number of defined variables
-        if(self.arg.stats and "--vars" in self.arg.stats_arg):
-            self.calculate_defined_variables()
-        #self.debug_print()
+    # JUMPIFNEQS - jumps to given label if 2 top values at data stack are not equal
+    def execute_jumpifneqs(self, instruction):
+        arg1 = instruction.args[0]
+        if(instruction.checks_stack):
+            self.chceck_available_data_stack(2)
+        first_op = self.data_stack.pop()
+        second_op = self.data_stack.pop()
+        if(type(first_op) != type(second_op)):
+            self.write_error("Invalid types\n")
+            sys.exit(53)
+        if(first_op != second_op):
+            self.counter = arg1.value       # jump to the destination
+        else:
+            self.counter = self.counter + 1
 
-    # calculates the maximum number of defined variables
+    # updates the maximum number of defined variables
     def calculate_defined_variables(self):
-        total_sum = 0
+        if(self.defined > self.vars):
+            self.vars = self.defined
+
+    # adjusts counts of defined variables when value in frame is replaced
+    def count_defined_variable(self, frame, old_value, new_value):
+        change = 0
+        if(old_value != None and old_value is not undefined):
+            change = change - 1
+        if(new_value != None):
+            change = change + 1
+
+        self.defined = self.defined + change
+        if(frame == "LF"):
+            self.local_counts[-1] = self.local_counts[-1] + change
+        elif(frame == "TF"):
+            self.temporary_count = self.temporary_count + change
 
-        # look in global frames
-        for key in self.global_frame:
-            if(self.global_frame[key] != None):
-                total_sum = total_sum + 1
+    # checks whether there is enough arguments pushed onto stack
+    def chceck_available_data_stack(self, number):
+        if(len(self.data_stack) < number):
+            self.write_error("Not enough data on data stack\n")
+            sys.exit(56)
 
-        # look in global frames
-        for i in range(0, len(self.local_frames)):
-            for key in self.local_frames[i]:
-                if(self.local_frames[i][key] != None):
-                    total_sum = total_sum + 1
+    # decodes escape sequences of string literal, equal literals share one decoded string
+    def decode_string(self, value):
+        if(value in self.constants):
+            return self.constants[value]
+
+        parts = value.split("\\")     # every part except the first one follows a backslash
+        decoded = [parts[0]]
+        for part in parts[1:]:
+            code = part[:3]
+            if(escape_code.fullmatch(code) != None):
+                decoded.append(chr(int(code)) + part[3:])
+            else:                       # not an escape sequence
+                decoded.append("\\" + part)
+        string = "".join(decoded)
+        self.constants.update({value : string})
+        return string
+
+# rewrites linked program into a shorter one that behaves the same, every remaining instruction
+# keeps in its weights how many instructions of the original program it stands for, so --insts
+# statistics stay the same as without optimizations
+class Optimizer:
+    # prepares optimization of the program of the interpret on given level
+    def __init__(self, interpret, level):
+        self.interpret = interpret
+        self.level = level
+
+        # conditional jumps can continue with the next instruction, so it's known which way they went
+        self.conditional = ["JUMPIFEQ", "JUMPIFNEQ", "JUMPIFEQS", "JUMPIFNEQS"]
+
+        # handlers for instructions whose operands have proven types
+        self.typed_handlers = {
+            "ADD" : interpret.execute_typed_add, "SUB" : interpret.execute_typed_sub,
+            "MUL" : interpret.execute_typed_mul, "IDIV" : interpret.execute_typed_idiv,
+            "LT" : interpret.execute_typed_lt, "GT" : interpret.execute_typed_gt, "EQ" : interpret.execute_typed_eq,
+        }
+
+        # instructions that can never be carried out are left out before anything else
+        self.instructions = self.reachable_instructions(interpret.instructions)
+        self.end = len(self.instructions)
+        self.removed = [False] * self.end
+
+        # instructions right after CALL are return destinations, they must stay in place
+        self.fixed = [False] * self.end
+        for i in range(0, self.end - 1):
+            if(self.instructions[i].opcode == "CALL"):
+                self.fixed[i + 1] = True
+
+    # optimizes the program
+    def run(self):
+        self.join_stack_moves()
+        if(self.level >= 2):
+            self.fold_constants()
+            self.infer_types()
+            self.measure_stack()
+            self.find_defined_variables()
+        for i in range(0, self.end):
+            if(self.instructions[i].opcode == "LABEL"):
+                self.remove(i)
+        if(self.level >= 2):
+            self.remove_dead_stores()
+        self.remove_jumps()
+        self.keep_jumps_distinguishable()
+        self.rewrite()
+
+    # returns instructions reachable from the start of the program with jump destinations moved to
+    # the new indices, the unreachable ones are described on stderr when --report-dead-code is given
+    def reachable_instructions(self, instructions):
+        end = len(instructions)
+        reachable = [False] * end
+        pending = [0]
+        while len(pending) != 0:
+            index = pending.pop()
+            if(index >= end or reachable[index]):
+                continue
+            reachable[index] = True
+            instruction = instructions[index]
+            if(instruction.opcode in jump_opcodes):
+                pending.append(instruction.args[0].value)
+            if(instruction.opcode not in ["JUMP", "RETURN", "EXIT"]):
+                pending.append(index + 1)
+
+        position = []
+        program = []
+        for i in range(0, end):
+            position.append(len(program))
+            if(reachable[i]):
+                program.append(instructions[i])
+        for instruction in program:
+            if(instruction.opcode in jump_opcodes):
+                instruction.args[0].value = position[instruction.args[0].value]
+
+        if(self.interpret.arg.report):
+            self.report(instructions, reachable)
+        return program
+
+    # writes out removed parts of the program with labels they start at
+    def report(self, instructions, reachable):
+        removed = len(instructions) - reachable.count(True)
+        sys.stderr.write("Unreachable code: " + str(removed) + " of " + str(len(instructions)) + " instructions removed\n")
+        i = 0
+        while i < len(instructions):
+            if(reachable[i]):
+                i = i + 1
+                continue
+            first = i
+            labels = []
+            while i < len(instructions) and not reachable[i]:
+                if(instructions[i].opcode == "LABEL"):
+                    labels.append(instructions[i].args[0].value)
+                i = i + 1
+            part = "  orders " + str(instructions[first].order) + "-" + str(instructions[i - 1].order)
+            if(i - first == 1):
+                part = part + " (1 instruction"
+            else:
+                part = part + " (" + str(i - first) + " instructions"
+            if(len(labels) != 0):
+                part = part + ", labels " + ", ".join(labels)
+            sys.stderr.write(part + ")\n")
+
+    # removes instruction unless it is return destination
+    def remove(self, index):
+        if(not self.fixed[index]):
+            self.removed[index] = True
+
+    # follows removed instructions from given index, returns index of the instruction that is carried
+    # out next and number of removed instructions on the way, None when removed jumps make a loop
+    def skip(self, index):
+        steps = 0
+        visited = set()
+        while index < self.end and self.removed[index]:
+            if(index in visited):
+                return None
+            visited.add(index)
+            steps = steps + 1
+            if(self.instructions[index].opcode == "JUMP"):
+                index = self.instructions[index].args[0].value
+            else:
+                index = index + 1
+        return index, steps
+
+    # like skip, but goes through remaining unconditional jumps as well
+    def thread(self, index):
+        landing, steps = self.skip(index)
+        visited = [landing]
+        while landing < self.end and self.instructions[landing].opcode == "JUMP":
+            target, skipped = self.skip(self.instructions[landing].args[0].value)
+            if(target in visited):  # endless loop, the last jump stays in it
+                break
+            visited.append(target)
+            landing = target
+            steps = steps + 1 + skipped
+        return landing, steps
+
+    # PUSHS <symb> followed by POPS <var> becomes MOVE <var> <symb>
+    def join_stack_moves(self):
+        for i in range(0, self.end - 1):
+            pushs = self.instructions[i]
+            pops = self.instructions[i + 1]
+            if(pushs.opcode == "PUSHS" and pops.opcode == "POPS" and not self.fixed[i + 1] and not self.removed[i]):
+                pushs.opcode = "MOVE"
+                pushs.args = [pops.args[0], pushs.args[0]]
+                pushs.execute = self.interpret.execute_stack_move
+                self.removed[i + 1] = True
+
+    # finds global variables with constant value at each instruction, their reads are replaced by
+    # the constants and instructions with constant operands are replaced by MOVE of their result,
+    # instructions that would fail are left unchanged so the error comes at the same moment
+    def fold_constants(self):
+        starts, states = self.analyze(self.propagate, {})
+        for start in states:
+            self.run_block(start, starts, dict(states[start]), self.propagate, True)
+
+    # finds what is known about global variables at the start of each reachable block, transfer
+    # function carries out one instruction on the facts, variable is in the facts once it surely
+    # exists and its fact is None when nothing more is known about it, entry holds facts at the start
+    def analyze(self, transfer, entry):
+        # block starts, return destinations are entered from RETURN anywhere so nothing is known there
+        starts = set([0])
+        unknown = set()
+        for i in range(0, self.end):
+            instruction = self.instructions[i]
+            if(instruction.opcode in jump_opcodes):
+                starts.add(instruction.args[0].value)
+            if(instruction.opcode in jump_opcodes or instruction.opcode in ["RETURN", "EXIT"]):
+                starts.add(i + 1)
+            if(instruction.opcode == "CALL"):
+                unknown.add(i + 1)
+
+        # only facts that hold on all paths to the block stay
+        states = {0 : entry}
+        for start in unknown:
+            states.update({start : {}})
+        pending = list(states.keys())
+        while len(pending) != 0:
+            start = pending.pop()
+            state = dict(states[start])
+            for successor in self.run_block(start, starts, state, transfer, False):
+                if(successor >= self.end):
+                    continue
+                if(successor not in states):
+                    states.update({successor : dict(state)})
+                    pending.append(successor)
+                    continue
+                known = states[successor]
+                common = {}
+                for slot in known:
+                    if(slot in state and state[slot] == known[slot]):
+                        common.update({slot : known[slot]})
+                    elif(slot in state):
+                        common.update({slot : None})
+                if(common != known):
+                    states.update({successor : common})
+                    pending.append(successor)
+        return starts, states
+
+    # goes through block starting at given index and keeps facts in state, instructions are
+    # changed only when rewrite is set, returns indices where the block continues
+    def run_block(self, index, starts, state, transfer, rewrite):
+        while True:
+            instruction = self.instructions[index]
+            if(not self.removed[index]):
+                transfer(instruction, state, rewrite)
+            opcode = instruction.opcode
+            if(opcode == "JUMP" or opcode == "CALL"):
+                return [instruction.args[0].value]
+            elif(opcode in self.conditional):
+                return [instruction.args[0].value, index + 1]
+            elif(opcode == "RETURN" or opcode == "EXIT"):
+                return []
+            index = index + 1
+            if(index >= self.end or index in starts):
+                return [index]
+
+    # carries out one instruction on known constants
+    def propagate(self, instruction, state, rewrite):
+        kinds = operand_kinds[instruction.opcode]
+        values = []
+        for i in range(0, len(kinds)):
+            operand = instruction.args[i]
+            value = undefined
+            if(kinds[i] != "symb"):
+                pass
+            elif(operand.type != "var"):
+                if(type(operand.value) in comparable_types):
+                    value = operand.value
+            elif(operand.frame == "GF" and state.get(operand.slot) != None):
+                value = state[operand.slot][1]
+                if(rewrite and (instruction.opcode in straight_opcodes or instruction.opcode in self.conditional)):
+                    instruction.args[i] = self.literal(value)
+            values.append(value)
+
+        if(instruction.opcode not in store_opcodes or len(kinds) == 0 or instruction.args[0].type != "var"):
+            return
+        result = self.evaluate(instruction.opcode, values)
+        target = instruction.args[0]
+        if(target.frame == "GF"):
+            if(result is undefined):
+                state.update({target.slot : None})
+            else:
+                state.update({target.slot : (type(result), result)})
+        if(rewrite and result is not undefined and instruction.opcode != "MOVE"):
+            instruction.opcode = "MOVE"
+            instruction.args = [target, self.literal(result)]
+            instruction.execute = self.interpret.dispatch["MOVE"]
+
+    # finds types of global variables at each instruction, arithmetic and relations whose operands
+    # have the right types and whose target surely exists get handlers without any checks
+    def infer_types(self):
+        if(self.interpret.count_vars):  # handlers without checks don't count defined variables
+            return
+        starts, states = self.analyze(self.infer, {})
+        for start in states:
+            self.run_block(start, starts, dict(states[start]), self.infer, True)
+
+    # carries out one instruction on known types of global variables
+    def infer(self, instruction, state, rewrite):
+        opcode = instruction.opcode
+        if(opcode not in store_opcodes or len(instruction.args) == 0 or instruction.args[0].type != "var"):
+            return
+
+        types = []
+        for operand in instruction.args[1:]:
+            if(operand.type == "var" and operand.frame == "GF"):
+                types.append(state.get(operand.slot))
+            elif(operand.type != "var" and type(operand.value) in comparable_types):
+                types.append(type(operand.value))
+            else:
+                types.append(None)
+
+        target = instruction.args[0]
+        if(rewrite and target.frame == "GF" and target.slot in state and opcode in self.typed_handlers):
+            if(opcode in ["ADD", "SUB", "MUL", "IDIV"]):
+                proven = types[0] is int and types[1] is int
+            else:
+                proven = types[0] != None and types[0] is types[1]
+            if(proven):
+                instruction.typed = True
+                instruction.execute = self.typed_handlers[opcode]
+
+        if(target.frame != "GF"):
+            return
+        if(opcode in ["ADD", "SUB", "MUL", "IDIV", "STRLEN", "STRI2INT"]):
+            result = int
+        elif(opcode in ["LT", "GT", "EQ", "AND", "OR", "NOT"]):
+            result = bool
+        elif(opcode in ["CONCAT", "GETCHAR", "INT2CHAR", "TYPE", "SETCHAR"]):
+            result = str
+        elif(opcode == "MOVE"):
+            result = types[0]
+        else:
+            result = None
+        state.update({target.slot : result})
+
+    # finds depth of data stack at each instruction, stack instructions that surely have enough
+    # values on the stack don't check it
+    def measure_stack(self):
+        starts, states = self.analyze(self.stack_depth, {"depth" : 0})
+        for start in states:
+            self.run_block(start, starts, dict(states[start]), self.stack_depth, True)
+
+    # carries out one instruction on known depth of data stack, depth isn't known after return
+    # from CALL, because the called code could change it
+    def stack_depth(self, instruction, state, rewrite):
+        depth = state.get("depth")
+        if(instruction.opcode == "CLEARS"):
+            state.update({"depth" : 0})
+        elif(instruction.opcode not in stack_effects or depth == None):
+            return
+        else:
+            needed, change = stack_effects[instruction.opcode]
+            if(depth < needed):                 # the instruction fails
+                state.update({"depth" : None})
+                return
+            if(rewrite and needed > 0):
+                instruction.checks_stack = False
+            state.update({"depth" : depth + change})
+
+    # finds variables that surely exist at each instruction, their existence isn't checked then
+    def find_defined_variables(self):
+        starts, states = self.analyze(self.define_variables, {})
+        for start in states:
+            self.run_block(start, starts, dict(states[start]), self.define_variables, True)
+
+    # carries out one instruction on variables that surely exist, the facts are pairs of frame name and
+    # slot, once instruction succeeds all its variables exist, frame instructions move the facts between frames
+    def define_variables(self, instruction, state, rewrite):
+        opcode = instruction.opcode
+        if(opcode == "CREATEFRAME"):
+            self.move_frame(state, None, "TF")
+        elif(opcode == "PUSHFRAME"):
+            self.move_frame(state, "TF", "LF")
+        elif(opcode == "POPFRAME"):
+            self.move_frame(state, "LF", "TF")
+
+        for operand in instruction.args:
+            if(operand.type != "var"):
+                continue
+            variable = (operand.frame, operand.slot)
+            if(rewrite and variable in state):
+                operand.checked = False
+            state.update({variable : True})
+
+    # frame instruction moved variables of the source frame to the target frame, the source frame
+    # doesn't exist or its variables aren't known afterwards
+    def move_frame(self, state, source, target):
+        moved = {}
+        for frame, slot in list(state.keys()):
+            if(frame == source):
+                moved.update({(target, slot) : True})
+            if(frame == source or frame == target):
+                del state[(frame, slot)]
+        state.update(moved)
+
+    # computes result of instruction with constant operands, undefined when it isn't known or the
+    # instruction would fail, conditions are the same as in the handlers of the table engine
+    def evaluate(self, opcode, values):
+        if(opcode not in ["MOVE", "TYPE", "NOT", "STRLEN", "INT2CHAR", "ADD", "SUB", "MUL", "IDIV", "LT", "GT", "EQ",
+                          "AND", "OR", "CONCAT", "GETCHAR", "STRI2INT"] or undefined in values[1:]):
+            return undefined
+        a = values[1]
+        b = None
+        if(len(values) == 3):
+            b = values[2]
 
-        # look in temporary frames
         try:
-            for key in self.temporary_frame:
-                if(self.temporary_frame[key] != None):
-                    total_sum = total_sum + 1
-        except:
+            if(opcode == "MOVE"):
+                return a
+            elif(opcode == "TYPE"):
+                if(type(a) is int):
+                    return "int"
+                elif(type(a) is bool):
+                    return "bool"
+                elif(a == "nil"):
+                    return "nil"
+                return "string"
+            elif(opcode == "NOT" and type(a) is bool):
+                return not a
+            elif(opcode == "STRLEN" and type(a) is str):
+                return len(a)
+            elif(opcode == "INT2CHAR" and type(a) is int):
+                return chr(a)
+            elif(opcode in ["ADD", "SUB", "MUL", "IDIV"] and type(a) is int and type(b) is int):
+                if(opcode == "ADD"):
+                    return a + b
+                elif(opcode == "SUB"):
+                    return a - b
+                elif(opcode == "MUL"):
+                    return a * b
+                elif(b != 0):
+                    return int(a / b)
+            elif(opcode in ["LT", "GT", "EQ"] and type(a) is type(b)):
+                if(opcode == "LT"):
+                    return a < b
+                elif(opcode == "GT"):
+                    return a > b
+                return a == b
+            elif(opcode in ["AND", "OR"] and type(a) is bool and type(b) is bool):
+                if(opcode == "AND"):
+                    return a and b
+                return a or b
+            elif(opcode == "CONCAT" and type(a) is str and type(b) is str):
+                return a + b
+            elif(opcode in ["GETCHAR", "STRI2INT"] and type(a) is str and type(b) is int and -len(a) <= b < len(a)):
+                if(opcode == "GETCHAR"):
+                    return a[b]
+                return ord(a[b])
+        except Exception:   # e.g. too big result of division, the handler fails the same way
             pass
+        return undefined
+
+    # creates literal operand of given value
+    def literal(self, value):
+        operand = Operand.__new__(Operand)
+        operand.type = {int : "int", bool : "bool", str : "string"}[type(value)]
+        operand.frame = None
+        operand.name = None
+        operand.value = value
+        operand.slot = None
+        operand.checked = True
+        return operand
+
+    # removes global variables that are only defined and set to constants, definition must be carried
+    # out before any jump so that it always comes first, BREAK and --vars would see the difference
+    def remove_dead_stores(self):
+        if(self.interpret.count_vars):
+            return
+        for instruction in self.instructions:
+            if(instruction.opcode == "BREAK"):
+                return
+
+        prefix = 0
+        while prefix < self.end and self.instructions[prefix].opcode not in ["LABEL", "RETURN"] + jump_opcodes:
+            prefix = prefix + 1
+
+        defined = set()
+        used = set()
+        stores = {}
+        for i in range(0, self.end):
+            instruction = self.instructions[i]
+            if(self.removed[i]):
+                continue
+            for position in range(0, len(instruction.args)):
+                operand = instruction.args[position]
+                if(operand.type != "var" or operand.frame != "GF"):
+                    continue
+                if(instruction.opcode == "DEFVAR" and i < prefix):
+                    defined.add(operand.slot)
+                elif(instruction.opcode == "DEFVAR" or
+                     (instruction.opcode == "MOVE" and position == 0 and instruction.args[1].type != "var")):
+                    if(operand.slot not in defined):
+                        used.add(operand.slot)  # variable may not exist yet, the error must stay
+                else:
+                    used.add(operand.slot)
+                stores.setdefault(operand.slot, []).append(i)
+
+        for slot in defined:
+            if(slot not in used):
+                for i in stores[slot]:
+                    self.remove(i)
+
+    # removes unconditional jumps that lead to the same instruction as the one after them
+    def remove_jumps(self):
+        changed = True
+        while changed:
+            changed = False
+            for i in range(0, self.end):
+                if(self.instructions[i].opcode == "JUMP" and not self.removed[i] and not self.fixed[i]):
+                    self.removed[i] = True
+                    if(self.jump_removable(i)):
+                        changed = True
+                    else:
+                        self.removed[i] = False
+
+    # checks whether removed jump at given index still goes to the same instruction as the one after it
+    def jump_removable(self, index):
+        target = self.skip(self.instructions[index].args[0].value)
+        following = self.skip(index + 1)
+        return target != None and following != None and target[0] == following[0]
+
+    # conditional jump whose both ways lead to the same instruction through different number of removed
+    # instructions would count wrong number of instructions, so instructions at both of its ends stay
+    def keep_jumps_distinguishable(self):
+        changed = True
+        while changed:
+            changed = False
+            for i in range(0, self.end):
+                instruction = self.instructions[i]
+                if(self.removed[i]):
+                    continue
+                if(instruction.opcode in self.conditional):
+                    target = self.skip(instruction.args[0].value)
+                    following = self.skip(i + 1)
+                    if(target != None and following != None and target[0] == following[0] and target[1] != following[1]):
+                        for index in [i + 1, instruction.args[0].value]:
+                            if(index < self.end and self.removed[index]):
+                                self.removed[index] = False
+                                changed = True
+
+            # instructions that stay can make removed jumps lead elsewhere
+            for i in range(0, self.end):
+                if(self.removed[i] and self.instructions[i].opcode == "JUMP" and not self.jump_removable(i)):
+                    self.removed[i] = False
+                    changed = True
+
+    # builds the new program and sets weights of its instructions
+    def rewrite(self):
+        position = []
+        program = []
+        for i in range(0, self.end):
+            position.append(len(program))
+            if(not self.removed[i]):
+                program.append(self.instructions[i])
+        position.append(len(program))
+
+        # removed instructions at the start are carried out before the first remaining one
+        self.interpret.insts = self.interpret.insts + self.skip(0)[1]
+
+        destinations = []
+        for i in range(0, self.end):
+            instruction = self.instructions[i]
+            if(self.removed[i]):
+                continue
+            following, steps = self.skip(i + 1)
+            instruction.weight = 1 + steps
+            instruction.jump_weight = instruction.weight
+            if(instruction.opcode == "RETURN" or instruction.opcode == "EXIT"):
+                instruction.weight = 1
+                instruction.jump_weight = 1
+            elif(instruction.opcode == "JUMP" or instruction.opcode == "CALL"):
+                target, steps = self.thread(instruction.args[0].value)
+                instruction.weight = 1 + steps
+                instruction.jump_weight = instruction.weight
+                destinations.append((instruction.args[0], position[target]))
+            elif(instruction.opcode in self.conditional):
+                target, steps = self.skip(instruction.args[0].value)
+                instruction.jump_weight = 1 + steps
+                destinations.append((instruction.args[0], position[target]))
+
+        # destinations are changed only now, all of them were followed in the original program
+        for operand, destination in destinations:
+            operand.value = destination
+        self.interpret.instructions = program
+
+
+# compiles decoded instructions into specialized closures and runs them
+# each closure returns the index of the next instruction of the linked program, anything unusual
+# (errors, missing values, uncommon types) is left to the generic handler of the table engine
+class ClosureEngine:
+    # compiles all instructions of the interpret
+    def __init__(self, interpret):
+        self.interpret = interpret
+        self.end = len(interpret.instructions)
+
+        # specialized closures for frequent opcodes, everything else uses generic handler
+        self.compilers = {
+            "CREATEFRAME" : self.compile_createframe, "PUSHFRAME" : self.compile_pushframe,
+            "POPFRAME" : self.compile_popframe, "DEFVAR" : self.compile_defvar,
+            "MOVE" : self.compile_move, "PUSHS" : self.compile_pushs, "POPS" : self.compile_pops,
+            "ADD" : self.compile_arithmetic, "SUB" : self.compile_arithmetic,
+            "MUL" : self.compile_arithmetic, "IDIV" : self.compile_idiv,
+            "LT" : self.compile_relation, "GT" : self.compile_relation, "EQ" : self.compile_relation,
+            "AND" : self.compile_logic, "OR" : self.compile_logic, "NOT" : self.compile_not,
+            "CONCAT" : self.compile_concat, "STRLEN" : self.compile_strlen,
+            "GETCHAR" : self.compile_getchar, "STRI2INT" : self.compile_getchar,
+            "INT2CHAR" : self.compile_int2char, "WRITE" : self.compile_write,
+            "LABEL" : self.compile_label, "JUMP" : self.compile_jump,
+            "JUMPIFEQ" : self.compile_conditional_jump, "JUMPIFNEQ" : self.compile_conditional_jump,
+            "CALL" : self.compile_call, "RETURN" : self.compile_return,
+            "ADDS" : self.compile_stack_arithmetic, "SUBS" : self.compile_stack_arithmetic,
+            "MULS" : self.compile_stack_arithmetic, "IDIVS" : self.compile_stack_idiv,
+            "LTS" : self.compile_stack_relation, "GTS" : self.compile_stack_relation,
+            "EQS" : self.compile_stack_relation,
+            "JUMPIFEQS" : self.compile_stack_jump, "JUMPIFNEQS" : self.compile_stack_jump,
+        }
+
+        # code is indexed just like the instructions
+        self.code = []
+        for index in range(0, self.end):
+            instruction = interpret.instructions[index]
+            generic = self.compile_generic(instruction, index)
+            if(interpret.count_vars and instruction.opcode in store_opcodes):
+                self.code.append(generic)   # only the table engine keeps count of defined variables
+            elif(instruction.opcode in self.compilers):
+                self.code.append(self.compilers[instruction.opcode](instruction, index, generic))
+            else:
+                self.code.append(generic)
+
+    # runs compiled code
+    def run(self):
+        interpret = self.interpret
+        code = self.code
+        instructions = interpret.instructions
+        end = self.end
+        counter = 0
+        if(interpret.count_insts or interpret.count_vars):
+            while counter < end:
+                index = counter
+                counter = code[index]()
+                if(interpret.count_insts):
+                    instruction = instructions[index]
+                    if(counter == index + 1):
+                        interpret.insts = interpret.insts + instruction.weight
+                    else:
+                        interpret.insts = interpret.insts + instruction.jump_weight
+                if(interpret.count_vars):
+                    interpret.calculate_defined_variables()
+        else:
+            while counter < end:
+                counter = code[counter]()
+        interpret.counter = counter
+
+    # executes instruction with the handler of the table engine
+    def compile_generic(self, instruction, index):
+        interpret = self.interpret
+        execute = instruction.execute
+        def generic():
+            interpret.counter = index
+            execute(instruction)
+            return interpret.counter
+        return generic
+
+    # compiles reading of operand, returns None whenever the value isn't available
+    def compile_read(self, operand):
+        interpret = self.interpret
+        slot = operand.slot
+        if(operand.type != "var"):
+            value = operand.value
+            def read_constant():
+                return value
+            return read_constant
+        elif(operand.frame == "GF"):
+            global_frame = interpret.global_frame
+            def read_global():
+                value = global_frame[slot]
+                if(value is not undefined):
+                    return value
+            return read_global
+        elif(operand.frame == "LF"):
+            local_frames = interpret.local_frames
+            def read_local():
+                if(local_frames):
+                    value = local_frames[-1][slot]
+                    if(value is not undefined):
+                        return value
+            return read_local
+        else:
+            def read_temporary():
+                frame = interpret.temporary_frame
+                if(frame is not None):
+                    value = frame[slot]
+                    if(value is not undefined):
+                        return value
+            return read_temporary
+
+    # compiles lookup of frame that contains target variable, returns None if there is none
+    def compile_target(self, operand):
+        interpret = self.interpret
+        slot = operand.slot
+        if(not operand.checked):       # the optimizer proved the variable exists
+            return self.compile_frame(operand)
+        if(operand.frame == "GF"):
+            global_frame = interpret.global_frame
+            def target_global():
+                if(global_frame[slot] is not undefined):
+                    return global_frame
+            return target_global
+        elif(operand.frame == "LF"):
+            local_frames = interpret.local_frames
+            def target_local():
+                if(local_frames and local_frames[-1][slot] is not undefined):
+                    return local_frames[-1]
+            return target_local
+        else:
+            def target_temporary():
+                frame = interpret.temporary_frame
+                if(frame is not None and frame[slot] is not undefined):
+                    return frame
+            return target_temporary
+
+    # compiles lookup of frame that surely contains target variable
+    def compile_frame(self, operand):
+        interpret = self.interpret
+        if(operand.frame == "GF"):
+            global_frame = interpret.global_frame
+            def frame_global():
+                return global_frame
+            return frame_global
+        elif(operand.frame == "LF"):
+            local_frames = interpret.local_frames
+            def frame_local():
+                return local_frames[-1]
+            return frame_local
+        else:
+            def frame_temporary():
+                return interpret.temporary_frame
+            return frame_temporary
+
+    # CREATEFRAME
+    def compile_createframe(self, instruction, index, generic):
+        interpret = self.interpret
+        free_frames = interpret.free_frames
+        blank = interpret.blank_frame
+        following = index + 1
+        if(blank == None):
+            def createframe():
+                frame = interpret.temporary_frame   # just like new_frame of the interpret
+                if(frame is None):
+                    if(not free_frames):
+                        interpret.temporary_frame = Frame()
+                        return following
+                    frame = free_frames.pop()
+                    interpret.temporary_frame = frame
+                frame.clear()
+                return following
+        else:
+            def createframe():
+                frame = interpret.temporary_frame
+                if(frame is None):
+                    if(not free_frames):
+                        interpret.temporary_frame = list(blank)
+                        return following
+                    frame = free_frames.pop()
+                    interpret.temporary_frame = frame
+                frame[:] = blank
+                return following
+        return createframe
+
+    # PUSHFRAME
+    def compile_pushframe(self, instruction, index, generic):
+        interpret = self.interpret
+        local_frames = interpret.local_frames
+        following = index + 1
+        def pushframe():
+            if(interpret.temporary_frame is None):
+                return generic()
+            local_frames.append(interpret.temporary_frame)
+            interpret.temporary_frame = None
+            return following
+        return pushframe
+
+    # POPFRAME
+    def compile_popframe(self, instruction, index, generic):
+        interpret = self.interpret
+        local_frames = interpret.local_frames
+        following = index + 1
+        free_frames = interpret.free_frames
+        def popframe():
+            if(not local_frames):
+                return generic()
+            if(interpret.temporary_frame is not None):
+                free_frames.append(interpret.temporary_frame)
+            interpret.temporary_frame = local_frames.pop()
+            return following
+        return popframe
+
+    # DEFVAR <var>
+    def compile_defvar(self, instruction, index, generic):
+        interpret = self.interpret
+        slot = instruction.args[0].slot
+        frame = instruction.args[0].frame
+        following = index + 1
+        if(frame == "GF"):
+            global_frame = interpret.global_frame
+            def defvar_global():
+                global_frame[slot] = None
+                return following
+            return defvar_global
+        elif(frame == "LF"):
+            local_frames = interpret.local_frames
+            def defvar_local():
+                if(not local_frames):
+                    return generic()
+                local_frames[-1][slot] = None
+                return following
+            return defvar_local
+        return generic
+
+    # MOVE <var> <symb>
+    def compile_move(self, instruction, index, generic):
+        arg1, arg2 = instruction.args
+        read = self.compile_read(arg2)
+        target = self.compile_target(arg1)
+        slot = arg1.slot
+        following = index + 1
+        def move():
+            value = read()
+            frame = target()
+            if(value is None or frame is None):
+                return generic()
+            frame[slot] = value
+            return following
+        return move
+
+    # PUSHS <symb>
+    def compile_pushs(self, instruction, index, generic):
+        arg1 = instruction.args[0]
+        read = self.compile_read(arg1)
+        interpret = self.interpret
+        data_stack = interpret.data_stack
+        push = data_stack.append
+        following = index + 1
+        if(instruction.updates_peak):
+            def pushs():
+                value = read()
+                if(value is None):
+                    return generic()
+                push(value)
+                if(len(data_stack) > interpret.stack_peak):
+                    interpret.stack_peak = len(data_stack)
+                return following
+        else:
+            def pushs():
+                value = read()
+                if(value is None):
+                    return generic()
+                push(value)
+                return following
+        return pushs
+
+    # POPS <var>
+    def compile_pops(self, instruction, index, generic):
+        data_stack = self.interpret.data_stack
+        target = self.compile_target(instruction.args[0])
+        slot = instruction.args[0].slot
+        following = index + 1
+        def pops():
+            frame = target()
+            if(not data_stack or frame is None):
+                return generic()
+            frame[slot] = data_stack.pop()
+            return following
+        return pops
+
+    # ADD, SUB, MUL <var> <symb> <symb>
+    def compile_arithmetic(self, instruction, index, generic):
+        arg1, arg2, arg3 = instruction.args
+        operation = {"ADD" : operator.add, "SUB" : operator.sub, "MUL" : operator.mul}[instruction.opcode]
+        read_1 = self.compile_read(arg2)
+        read_2 = self.compile_read(arg3)
+        target = self.compile_target(arg1)
+        slot = arg1.slot
+        following = index + 1
+        if(instruction.typed):
+            global_frame = self.interpret.global_frame
+            def typed_arithmetic():
+                global_frame[slot] = operation(read_1(), read_2())
+                return following
+            return typed_arithmetic
+        def arithmetic():
+            value_1 = read_1()
+            value_2 = read_2()
+            frame = target()
+            if(type(value_1) is not int or type(value_2) is not int or frame is None):
+                return generic()
+            frame[slot] = operation(value_1, value_2)
+            return following
+        return arithmetic
+
+    # IDIV <var> <symb> <symb>
+    def compile_idiv(self, instruction, index, generic):
+        arg1, arg2, arg3 = instruction.args
+        read_1 = self.compile_read(arg2)
+        read_2 = self.compile_read(arg3)
+        target = self.compile_target(arg1)
+        slot = arg1.slot
+        following = index + 1
+        if(instruction.typed):
+            global_frame = self.interpret.global_frame
+            def typed_idiv():
+                value_2 = read_2()
+                if(value_2 == 0):
+                    return generic()
+                global_frame[slot] = int(read_1() / value_2)
+                return following
+            return typed_idiv
+        def idiv():
+            value_1 = read_1()
+            value_2 = read_2()
+            frame = target()
+            if(type(value_1) is not int or type(value_2) is not int or value_2 == 0 or frame is None):
+                return generic()
+            frame[slot] = int(value_1 / value_2)
+            return following
+        return idiv
+
+    # LT, GT, EQ <var> <symb> <symb>
+    def compile_relation(self, instruction, index, generic):
+        arg1, arg2, arg3 = instruction.args
+        operation = {"LT" : operator.lt, "GT" : operator.gt, "EQ" : operator.eq}[instruction.opcode]
+        read_1 = self.compile_read(arg2)
+        read_2 = self.compile_read(arg3)
+        target = self.compile_target(arg1)
+        slot = arg1.slot
+        following = index + 1
+        if(instruction.typed):
+            global_frame = self.interpret.global_frame
+            def typed_relation():
+                global_frame[slot] = operation(read_1(), read_2())
+                return following
+            return typed_relation
+        def relation():
+            value_1 = read_1()
+            value_2 = read_2()
+            frame = target()
+            if(type(value_1) is not type(value_2) or type(value_1) not in comparable_types or frame is None):
+                return generic()
+            frame[slot] = operation(value_1, value_2)
+            return following
+        return relation
+
+    # AND, OR <var> <symb> <symb>
+    def compile_logic(self, instruction, index, generic):
+        arg1, arg2, arg3 = instruction.args
+        conjunction = instruction.opcode == "AND"
+        read_1 = self.compile_read(arg2)
+        read_2 = self.compile_read(arg3)
+        target = self.compile_target(arg1)
+        slot = arg1.slot
+        following = index + 1
+        def logic():
+            value_1 = read_1()
+            value_2 = read_2()
+            frame = target()
+            if(type(value_1) is not bool or type(value_2) is not bool or frame is None):
+                return generic()
+            if(conjunction):
+                frame[slot] = value_1 and value_2
+            else:
+                frame[slot] = value_1 or value_2
+            return following
+        return logic
+
+    # NOT <var> <symb>
+    def compile_not(self, instruction, index, generic):
+        arg1, arg2 = instruction.args
+        read = self.compile_read(arg2)
+        target = self.compile_target(arg1)
+        slot = arg1.slot
+        following = index + 1
+        def negation():
+            value = read()
+            frame = target()
+            if(type(value) is not bool or frame is None):
+                return generic()
+            frame[slot] = not value
+            return following
+        return negation
+
+    # CONCAT <var> <symb> <symb>
+    def compile_concat(self, instruction, index, generic):
+        arg1, arg2, arg3 = instruction.args
+        read_1 = self.compile_read(arg2)
+        read_2 = self.compile_read(arg3)
+        target = self.compile_target(arg1)
+        slot = arg1.slot
+        following = index + 1
+        def concat():
+            value_1 = read_1()
+            value_2 = read_2()
+            frame = target()
+            if(type(value_1) is not str or type(value_2) is not str or frame is None):
+                return generic()
+            frame[slot] = value_1 + value_2
+            return following
+        return concat
+
+    # STRLEN <var> <symb>
+    def compile_strlen(self, instruction, index, generic):
+        arg1, arg2 = instruction.args
+        read = self.compile_read(arg2)
+        target = self.compile_target(arg1)
+        slot = arg1.slot
+        following = index + 1
+        def strlen():
+            value = read()
+            frame = target()
+            if(type(value) is not str or frame is None):
+                return generic()
+            frame[slot] = len(value)
+            return following
+        return strlen
+
+    # GETCHAR, STRI2INT <var> <symb> <symb>
+    def compile_getchar(self, instruction, index, generic):
+        arg1, arg2, arg3 = instruction.args
+        ordinal = instruction.opcode == "STRI2INT"
+        read_1 = self.compile_read(arg2)
+        read_2 = self.compile_read(arg3)
+        target = self.compile_target(arg1)
+        slot = arg1.slot
+        following = index + 1
+        def getchar():
+            string = read_1()
+            position = read_2()
+            frame = target()
+            if(type(string) is not str or type(position) is not int or frame is None):
+                return generic()
+            try:
+                char = string[position]
+            except IndexError:
+                return generic()
+            if(ordinal):
+                frame[slot] = ord(char)
+            else:
+                frame[slot] = char
+            return following
+        return getchar
+
+    # INT2CHAR <var> <symb>
+    def compile_int2char(self, instruction, index, generic):
+        arg1, arg2 = instruction.args
+        if(arg2.type != "var" and arg2.type != "int"):
+            return generic
+        read = self.compile_read(arg2)
+        target = self.compile_target(arg1)
+        slot = arg1.slot
+        following = index + 1
+        def int2char():
+            value = read()
+            frame = target()
+            if(type(value) is not int or frame is None):
+                return generic()
+            try:
+                frame[slot] = chr(value)
+            except (ValueError, OverflowError):
+                return generic()
+            return following
+        return int2char
+
+    # WRITE <symb>
+    def compile_write(self, instruction, index, generic):
+        read = self.compile_read(instruction.args[0])
+        write_value = self.interpret.write_value
+        following = index + 1
+        def write():
+            value = read()
+            if(value is None):
+                return generic()
+            write_value(value)
+            return following
+        return write
+
+    # LABEL <label>
+    def compile_label(self, instruction, index, generic):
+        following = index + 1
+        def label():
+            return following
+        return label
+
+    # JUMP <label>
+    def compile_jump(self, instruction, index, generic):
+        destination = instruction.args[0].value
+        def jump():
+            return destination
+        return jump
+
+    # JUMPIFEQ, JUMPIFNEQ <label> <symb> <symb>
+    def compile_conditional_jump(self, instruction, index, generic):
+        arg1, arg2, arg3 = instruction.args
+        destination = arg1.value
+        equal = instruction.opcode == "JUMPIFEQ"
+        read_1 = self.compile_read(arg2)
+        read_2 = self.compile_read(arg3)
+        following = index + 1
+        def conditional_jump():
+            value_1 = read_1()
+            value_2 = read_2()
+            if(type(value_1) is not type(value_2) or type(value_1) not in comparable_types):
+                return generic()
+            if((value_1 == value_2) == equal):
+                return destination
+            return following
+        return conditional_jump
+
+    # CALL <label>
+    def compile_call(self, instruction, index, generic):
+        destination = instruction.args[0].value
+        call_stack = self.interpret.call_stack
+        following = index + 1
+        def call():
+            call_stack.append(following)
+            return destination
+        return call
+
+    # RETURN
+    def compile_return(self, instruction, index, generic):
+        call_stack = self.interpret.call_stack
+        def return_():
+            if(not call_stack):
+                return generic()
+            return call_stack.pop()
+        return return_
+
+    # ADDS, SUBS, MULS
+    def compile_stack_arithmetic(self, instruction, index, generic):
+        operation = {"ADDS" : operator.add, "SUBS" : operator.sub, "MULS" : operator.mul}[instruction.opcode]
+        data_stack = self.interpret.data_stack
+        following = index + 1
+        def stack_arithmetic():
+            if(len(data_stack) < 2):
+                return generic()
+            first_op = data_stack[-2]
+            second_op = data_stack[-1]
+            if(type(first_op) is not int or type(second_op) is not int):
+                return generic()
+            del data_stack[-1]
+            data_stack[-1] = operation(first_op, second_op)
+            return following
+        return stack_arithmetic
+
+    # IDIVS
+    def compile_stack_idiv(self, instruction, index, generic):
+        data_stack = self.interpret.data_stack
+        following = index + 1
+        def stack_idiv():
+            if(len(data_stack) < 2):
+                return generic()
+            first_op = data_stack[-2]
+            second_op = data_stack[-1]
+            if(type(first_op) is not int or type(second_op) is not int or second_op == 0):
+                return generic()
+            del data_stack[-1]
+            data_stack[-1] = int(first_op / second_op)
+            return following
+        return stack_idiv
+
+    # LTS, GTS, EQS
+    def compile_stack_relation(self, instruction, index, generic):
+        operation = {"LTS" : operator.lt, "GTS" : operator.gt, "EQS" : operator.eq}[instruction.opcode]
+        data_stack = self.interpret.data_stack
+        following = index + 1
+        def stack_relation():
+            if(len(data_stack) < 2):
+                return generic()
+            first_op = data_stack[-2]
+            second_op = data_stack[-1]
+            if(type(first_op) is not type(second_op) or type(first_op) not in comparable_types):
+                return generic()
+            del data_stack[-1]
+            data_stack[-1] = operation(first_op, second_op)
+            return following
+        return stack_relation
+
+    # JUMPIFEQS, JUMPIFNEQS <label>
+    def compile_stack_jump(self, instruction, index, generic):
+        destination = instruction.args[0].value
+        equal = instruction.opcode == "JUMPIFEQS"
+        data_stack = self.interpret.data_stack
+        following = index + 1
+        def stack_jump():
+            if(len(data_stack) < 2):
+                return generic()
+            first_op = data_stack[-2]
+            second_op = data_stack[-1]
+            if(type(first_op) is not type(second_op) or type(first_op) not in comparable_types):
+                return generic()
+            del data_stack[-2:]
+            if((first_op == second_op) == equal):
+                return destination
+            return following
+        return stack_jump
+
+# translates decoded instructions into source of a single Python function and runs it
+# basic blocks become straight-line code guarded by the counter, the counter is only
+# tested at block boundaries, anything unusual is left to the generic handler of the table engine
+class Transpiler:
+    # generates the source code for all instructions of the interpret
+    def __init__(self, interpret):
+        self.interpret = interpret
+        self.end = len(interpret.instructions)
+        self.size = len(interpret.frame_names)
+
+        # instructions that end basic block
+        self.control = ["JUMP", "JUMPIFEQ", "JUMPIFNEQ", "JUMPIFEQS", "JUMPIFNEQS", "CALL", "RETURN"]
+
+        # destinations of jumps, the optimizer may leave them on any instruction
+        targets = set()
+        for instruction in interpret.instructions:
+            if(instruction.opcode in jump_opcodes):
+                targets.add(instruction.args[0].value)
+
+        # split instructions into basic blocks, each block is a list of instruction indices
+        blocks = []
+        for index in range(0, self.end):
+            if(len(blocks) == 0 or index in targets):
+                blocks.append([index])
+            elif(interpret.instructions[index - 1].opcode in self.control):
+                blocks.append([index])
+            else:
+                blocks[-1].append(index)
+
+        lines = []
+        lines.append("def program(interpret, generic, write_value, comparable_types, undefined, Frame):")
+        lines.append("    global_frame = interpret.global_frame")
+        lines.append("    local_frames = interpret.local_frames")
+        lines.append("    data_stack = interpret.data_stack")
+        lines.append("    push = data_stack.append")
+        lines.append("    call_stack = interpret.call_stack")
+        lines.append("    free_frames = interpret.free_frames")
+        lines.append("    calculate_defined_variables = interpret.calculate_defined_variables")
+        lines.append("    empty = [undefined] * " + str(self.size))
+        lines.append("    blank = interpret.blank_frame")
+        lines.append("    insts = 0")
+        lines.append("    counter = 0")
+        # CPython specializes instructions of function called once only after it jumps backward enough
+        # times, loop with condition at its end jumps back in other way, so the condition is checked here
+        lines.append("    while True:")
+        lines.append("        if counter >= " + str(self.end) + ":")
+        lines.append("            break")
+        self.generate_tree(blocks, lines, 2)
+        lines.append("    interpret.insts = interpret.insts + insts")
+        lines.append("    return counter")
+        self.source = "\n".join(lines) + "\n"
+
+    # generates nested range checks so that only a few comparisons are needed to find a block
+    def generate_tree(self, blocks, lines, depth):
+        indent = "    " * depth
+        if(len(blocks) <= 8):
+            for block in blocks:
+                lines.append(indent + "if counter == " + str(block[0]) + ":")
+                self.generate_block(block, lines, depth + 1)
+            return
+        middle = len(blocks) // 2
+        lines.append(indent + "if counter < " + str(blocks[middle][0]) + ":")
+        self.generate_tree(blocks[:middle], lines, depth + 1)
+        lines.append(indent + "if counter >= " + str(blocks[middle][0]) + ":")
+        self.generate_tree(blocks[middle:], lines, depth + 1)
+
+    # generates code of one basic block
+    def generate_block(self, block, lines, depth):
+        indent = "    " * depth
+        interpret = self.interpret
+        # every instruction is counted with its weight, only the last one may depend on the jump
+        last = interpret.instructions[block[-1]]
+        counted = 0
+        for index in block:
+            counted = counted + interpret.instructions[index].weight
+        if(last.jump_weight != last.weight):
+            counted = counted - last.weight
+        if(interpret.count_insts):
+            lines.append(indent + "insts = insts + " + str(counted))
+        for index in block:
+            instruction = interpret.instructions[index]
+            lines.append(indent + "# " + str(instruction.order) + ": " + instruction.opcode)
+            code = self.generate_instruction(instruction, index)
+            for line in code:
+                lines.append(indent + line)
+            if(interpret.count_insts and instruction.jump_weight != instruction.weight):
+                lines.append(indent + "insts = insts + (" + str(instruction.weight) + " if counter == " + str(index + 1) +
+                             " else " + str(instruction.jump_weight) + ")")
+            if(interpret.count_vars):
+                lines.append(indent + "calculate_defined_variables()")
+        if(instruction.opcode not in self.control):
+            lines.append(indent + "counter = " + str(block[-1] + 1))
+
+    # expression that reads value of operand, it is None whenever the value isn't available
+    def read(self, operand):
+        if(operand.type != "var"):
+            if(type(operand.value) in comparable_types):
+                return repr(operand.value)
+            return "None"
+        elif(operand.frame == "GF"):
+            return "global_frame[" + str(operand.slot) + "]"
+        elif(operand.frame == "LF"):
+            return "(local_frames[-1][" + str(operand.slot) + "] if local_frames else None)"
+        return "(interpret.temporary_frame or empty)[" + str(operand.slot) + "]"
+
+    # condition checking that value read by given expression has given type
+    def guard(self, operand, expression, value_type):
+        if(operand.type != "var"):
+            if(type(operand.value) is value_type):
+                return []
+            return ["False"]
+        return [expression + ".__class__ is " + value_type.__name__]
+
+    # condition checking that value read from operand is available
+    def available(self, operand, expression):
+        if(operand.type != "var"):
+            if(type(operand.value) in comparable_types):
+                return []
+            return ["False"]
+        return [expression + " is not None", expression + " is not undefined"]
+
+    # conditions checking that target variable exists and statement that stores value into it,
+    # there are no conditions when the optimizer proved the variable exists
+    def target(self, operand):
+        slot = "[" + str(operand.slot) + "]"
+        if(operand.frame == "GF"):
+            check, store = "global_frame" + slot + " is not undefined", "global_frame" + slot + " = "
+        elif(operand.frame == "LF"):
+            check, store = "local_frames and local_frames[-1]" + slot + " is not undefined", "local_frames[-1]" + slot + " = "
+        else:
+            check, store = "(interpret.temporary_frame or empty)" + slot + " is not undefined", "interpret.temporary_frame" + slot + " = "
+        if(operand.checked):
+            return [check], store
+        return [], store
+
+    # leaves out check of data stack depth when the optimizer proved it
+    def stack_conditions(self, instruction, conditions):
+        if(instruction.checks_stack):
+            return conditions
+        return [condition for condition in conditions if condition not in ["data_stack", "len(data_stack) >= 2"]]
+
+    # wraps fast code into condition, generic handler is used if the condition fails
+    def guarded(self, conditions, code, index):
+        fallback = "generic[" + str(index) + "]()"
+        if("False" in conditions):
+            return [fallback]
+        if(len(conditions) == 0):
+            return code
+        result = ["if " + " and ".join(conditions) + ":"]
+        for line in code:
+            result.append("    " + line)
+        result.append("else:")
+        result.append("    " + fallback)
+        return result
+
+    # generates code of one instruction
+    def generate_instruction(self, instruction, index):
+        opcode = instruction.opcode
+        args = instruction.args
+        fallback = "generic[" + str(index) + "]()"
+        following = str(index + 1)
+
+        if(self.interpret.count_vars and opcode in store_opcodes):
+            return [fallback]   # only the table engine keeps count of defined variables
+        elif(opcode in ["ADD", "SUB", "MUL", "IDIV", "LT", "GT", "EQ", "AND", "OR", "CONCAT", "GETCHAR", "STRI2INT"]):
+            check, store = self.target(args[0])
+            code = ["a = " + self.read(args[1]), "b = " + self.read(args[2])]
+            if(opcode in ["ADD", "SUB", "MUL", "IDIV"]):
+                conditions = self.guard(args[1], "a", int) + self.guard(args[2], "b", int)
+                if(opcode == "IDIV"):
+                    conditions.append("b != 0")
+                    expression = "int(a / b)"
+                else:
+                    expression = "a " + {"ADD" : "+", "SUB" : "-", "MUL" : "*"}[opcode] + " b"
+            elif(opcode in ["LT", "GT", "EQ"]):
+                conditions = ["a.__class__ is b.__class__", "a.__class__ in comparable_types"]
+                expression = "a " + {"LT" : "<", "GT" : ">", "EQ" : "=="}[opcode] + " b"
+            elif(opcode in ["AND", "OR"]):
+                conditions = self.guard(args[1], "a", bool) + self.guard(args[2], "b", bool)
+                expression = "a " + opcode.lower() + " b"
+            elif(opcode == "CONCAT"):
+                conditions = self.guard(args[1], "a", str) + self.guard(args[2], "b", str)
+                expression = "a + b"
+            else:
+                conditions = self.guard(args[1], "a", str) + self.guard(args[2], "b", int)
+                conditions.append("-len(a) <= b < len(a)")
+                if(opcode == "GETCHAR"):
+                    expression = "a[b]"
+                else:
+                    expression = "ord(a[b])"
+            if(instruction.typed):  # types are proven and the target exists, only zero division is left
+                conditions = [condition for condition in conditions if condition == "b != 0"]
+                return code + self.guarded(conditions, [store + expression], index)
+            return code + self.guarded(conditions + check, [store + expression], index)
+        elif(opcode in ["NOT", "STRLEN", "INT2CHAR", "MOVE"]):
+            check, store = self.target(args[0])
+            code = ["a = " + self.read(args[1])]
+            if(opcode == "NOT"):
+                conditions = self.guard(args[1], "a", bool)
+                expression = "not a"
+            elif(opcode == "STRLEN"):
+                conditions = self.guard(args[1], "a", str)
+                expression = "len(a)"
+            elif(opcode == "INT2CHAR"):
+                if(args[1].type != "var" and args[1].type != "int"):
+                    return [fallback]
+                conditions = self.guard(args[1], "a", int) + ["0 <= a <= 1114111"]
+                expression = "chr(a)"
+            else:
+                conditions = self.available(args[1], "a")
+                expression = "a"
+            return code + self.guarded(conditions + check, [store + expression], index)
+        elif(opcode == "DEFVAR"):
+            slot = "[" + str(args[0].slot) + "]"
+            if(args[0].frame == "GF"):
+                return ["global_frame" + slot + " = None"]
+            elif(args[0].frame == "LF"):
+                return self.guarded(["local_frames"], ["local_frames[-1]" + slot + " = None"], index)
+            elif(args[0].frame == "TF"):
+                return self.guarded(["interpret.temporary_frame is not None"], ["interpret.temporary_frame" + slot + " = None"], index)
+            return [fallback]
+        elif(opcode == "CREATEFRAME"):
+            if(self.interpret.blank_frame == None):
+                create, clear = "Frame()", "a.clear()"
+            else:
+                create, clear = "list(blank)", "a[:] = blank"
+            code = ["a = interpret.temporary_frame", "if a is None:",
+                    "    a = free_frames.pop() if free_frames else " + create,
+                    "    interpret.temporary_frame = a", clear]
+            return code
+        elif(opcode == "PUSHFRAME"):
+            code = ["local_frames.append(interpret.temporary_frame)", "interpret.temporary_frame = None"]
+            return self.guarded(["interpret.temporary_frame is not None"], code, index)
+        elif(opcode == "POPFRAME"):
+            code = ["if interpret.temporary_frame is not None: free_frames.append(interpret.temporary_frame)",
+                    "interpret.temporary_frame = local_frames.pop()"]
+            return self.guarded(["local_frames"], code, index)
+        elif(opcode == "PUSHS"):
+            code = ["push(a)"]
+            if(instruction.updates_peak):
+                code.append("if len(data_stack) > interpret.stack_peak: interpret.stack_peak = len(data_stack)")
+            return ["a = " + self.read(args[0])] + self.guarded(self.available(args[0], "a"), code, index)
+        elif(opcode == "POPS"):
+            check, store = self.target(args[0])
+            return self.guarded(self.stack_conditions(instruction, ["data_stack"] + check), [store + "data_stack.pop()"], index)
+        elif(opcode == "WRITE"):
+            return ["a = " + self.read(args[0])] + self.guarded(self.available(args[0], "a"), ["write_value(a)"], index)
+        elif(opcode == "LABEL"):
+            return []
+        elif(opcode in ["ADDS", "SUBS", "MULS", "IDIVS", "LTS", "GTS", "EQS"]):
+            conditions = ["len(data_stack) >= 2"]
+            if(opcode in ["ADDS", "SUBS", "MULS", "IDIVS"]):
+                conditions = conditions + ["data_stack[-1].__class__ is int", "data_stack[-2].__class__ is int"]
+                if(opcode == "IDIVS"):
+                    conditions.append("data_stack[-1] != 0")
+                    expression = "int(a / b)"
+                else:
+                    expression = "a " + {"ADDS" : "+", "SUBS" : "-", "MULS" : "*"}[opcode] + " b"
+            else:
+                conditions = conditions + ["data_stack[-1].__class__ is data_stack[-2].__class__", "data_stack[-1].__class__ in comparable_types"]
+                expression = "a " + {"LTS" : "<", "GTS" : ">", "EQS" : "=="}[opcode] + " b"
+            code = ["b = data_stack.pop()", "a = data_stack[-1]", "data_stack[-1] = " + expression]
+            return self.guarded(self.stack_conditions(instruction, conditions), code, index)
+        elif(opcode == "JUMP"):
+            destination = str(args[0].value)
+            return ["counter = " + destination]
+        elif(opcode in ["JUMPIFEQ", "JUMPIFNEQ", "JUMPIFEQS", "JUMPIFNEQS"]):
+            destination = str(args[0].value)
+            if(opcode in ["JUMPIFEQ", "JUMPIFNEQ"]):
+                code = ["a = " + self.read(args[1]), "b = " + self.read(args[2])]
+                conditions = ["a.__class__ is b.__class__", "a.__class__ in comparable_types"]
+                taken = []
+            else:
+                code = []
+                conditions = ["len(data_stack) >= 2", "data_stack[-1].__class__ is data_stack[-2].__class__", "data_stack[-1].__class__ in comparable_types"]
+                conditions = self.stack_conditions(instruction, conditions)
+                taken = ["b = data_stack.pop()", "a = data_stack.pop()"]
+            relation = {"JUMPIFEQ" : "==", "JUMPIFNEQ" : "!=", "JUMPIFEQS" : "==", "JUMPIFNEQS" : "!="}[opcode]
+            taken.append("counter = " + destination + " if a " + relation + " b else " + following)
+            return code + ["if " + " and ".join(conditions) + ":"] + ["    " + line for line in taken] + ["else:", "    counter = " + fallback]
+        elif(opcode == "CALL"):
+            destination = str(args[0].value)
+            return ["call_stack.append(" + following + ")", "counter = " + destination]
+        elif(opcode == "RETURN"):
+            return ["if call_stack:", "    counter = call_stack.pop()", "else:", "    counter = " + fallback]
+        return [fallback]
+
+    # compiles the generated source and runs it
+    def run(self):
+        interpret = self.interpret
+        namespace = {}
+        exec(compile(self.source, "<IPPcode19>", "exec"), namespace)
+
+        # generic handlers of the table engine indexed just like the instructions
+        generic = []
+        for index in range(0, self.end):
+            generic.append(self.generic(interpret.instructions[index], index))
+
+        counter = namespace["program"](interpret, generic, interpret.write_value, comparable_types, undefined, Frame)
+        interpret.counter = counter
+
+    # executes instruction with the handler of the table engine
+    def generic(self, instruction, index):
+        interpret = self.interpret
+        execute = instruction.execute
+        def generic():
+            interpret.counter = index
+            execute(instruction)
+            return interpret.counter
+        return generic
 
-        if(total_sum > self.vars):
-            self.vars = total_sum
-
-    # checks whether there is enough arguments pushed onto stack
-    def chceck_available_data_stack(self, number):
-        if(len(self.data_stack) < number):
-            sys.stderr.write("Not enough data on data stack\n")
-            sys.exit(56)
 
-    # removes given number of parameters from stack
-    def remove_from_stack(self, number):
-        for dummy in range(0, number):
-            del self.data_stack[len(self.data_stack) - 1]
-
-    # replaces decimal escape sequences
-    def replace_decimal_escapes(self, s):
-        return re.sub(
-        r"\\(\d\d\d)",
-        lambda x: chr(int(x.group(1), 10)), 
-        s
-    )
-            
 # starts interpret, prepares labels
 def main():  
     my_interpret = Interpret()
-    my_interpret.prepare_labels()
-    my_interpret.start()
+    try:
+        my_interpret.link_program()
+        my_interpret.start()
+    finally:    # output is written out on EXIT and error exits as well
+        my_interpret.output.flush()
     
 
 # calls the main function
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# tests of the interpret, programs in this directory use the same files as test.php
+# (.src, .in, .out, .rc) and every program is run with every engine and optimization level,
+# programs with .err file also have their error output checked, which BREAK and DPRINT write
+import glob
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+try:
+    import resource
+except ImportError:     # not available on Windows
+    resource = None
+
+directory = os.path.dirname(os.path.abspath(__file__))
+interpret = os.path.join(os.path.dirname(directory), "interpret.py")
+
+# engines and optimization levels every program is run with
+engines = ["table", "closure", "transpile"]
+levels = [[], ["-O1"], ["-O2"]]
+
+# runs the interpret with given arguments, returns its exit code, standard output and error output
+def run(arguments):
+    process = subprocess.run([sys.executable, interpret] + arguments, stdin=subprocess.DEVNULL,
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return process.returncode, process.stdout.decode("utf-8"), process.stderr.decode("utf-8")
+
+# writes program given as list of instructions (opcode and arguments as type and value) to the file
+def write_program(path, instructions):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<program language="IPPcode19">']
+    for order in range(0, len(instructions)):
+        opcode, args = instructions[order][0], instructions[order][1:]
+        text = ""
+        for i in range(0, len(args)):
+            text = text + '<arg%d type="%s">%s</arg%d>' % (i + 1, args[i][0], args[i][1], i + 1)
+        lines.append('    <instruction order="%d" opcode="%s">%s</instruction>' % (order + 1, opcode, text))
+    lines.append("</program>")
+    with open(path, "w", encoding="utf-8") as program:
+        program.write("\n".join(lines) + "\n")
+
+# reads file of the test, missing file has given content like in test.php
+def read_test_file(path, default):
+    if(not os.path.exists(path)):
+        return default
+    with open(path, encoding="utf-8") as test_file:
+        return test_file.read()
+
+# runs programs of the test directory and compares their results with the expected ones
+class ProgramTests(unittest.TestCase):
+    # every program gives the expected output and exit code with all engines and levels
+    def test_programs(self):
+        for source in sorted(glob.glob(os.path.join(directory, "*.src"))):
+            name = source[:-len(".src")]
+            expected_output = read_test_file(name + ".out", "")
+            expected_code = int(read_test_file(name + ".rc", "0"))
+            expected_errors = read_test_file(name + ".err", None)
+            for engine in engines:
+                for level in levels:
+                    with self.subTest(program=os.path.basename(name), engine=engine, level=level):
+                        code, output, errors = run(["--source=" + source, "--input=" + name + ".in",
+                                                    "--engine=" + engine] + level)
+                        self.assertEqual(code, expected_code, errors)
+                        self.assertEqual(output, expected_output)
+                        if(expected_errors != None):
+                            self.assertEqual(errors, expected_errors)
+
+# checks Python source generated by the transpile engine
+class TranspilerTests(unittest.TestCase):
+    # source written by --dump-source compiles and the program still runs with it
+    def test_dump_source_compiles(self):
+        for name in ["call_return", "stack", "err_zero_division"]:
+            with self.subTest(program=name), tempfile.TemporaryDirectory() as temporary:
+                dump = os.path.join(temporary, "program.py")
+                source = os.path.join(directory, name + ".src")
+                code, output, errors = run(["--source=" + source, "--input=" + os.path.join(directory, name + ".in"),
+                                            "--engine=transpile", "--dump-source=" + dump])
+                self.assertEqual(code, int(read_test_file(os.path.join(directory, name + ".rc"), "0")), errors)
+                with open(dump) as dump_file:
+                    compile(dump_file.read(), dump, "exec")
+
+# checks that output kept by --output-buffer is written out in the order the program wrote it
+class OutputTests(unittest.TestCase):
+    # output written before error exit comes before the error message, also with messages of DPRINT
+    def test_error_exit_order(self):
+        with tempfile.TemporaryDirectory() as temporary:
+            source = os.path.join(temporary, "program.src")
+            write_program(source, [
+                ("DEFVAR", ("var", "GF@a")),
+                ("WRITE", ("string", "first")),
+                ("DPRINT", ("string", "-debug-")),
+                ("WRITE", ("string", "second")),
+                ("IDIV", ("var", "GF@a"), ("int", "1"), ("int", "0"))])
+            for engine in engines:
+                for size in ["0", "4", "8192"]:
+                    with self.subTest(engine=engine, size=size):
+                        process = subprocess.run([sys.executable, interpret, "--source=" + source, "--engine=" + engine,
+                                                  "--output-buffer=" + size], stdin=subprocess.DEVNULL,
+                                                 stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+                        self.assertEqual(process.returncode, 57)
+                        self.assertEqual(process.stdout.decode("utf-8"), "first-debug-secondZero division\n")
+
+# checks jumps removed by the optimizer and unreachable code it reports
+class OptimizerTests(unittest.TestCase):
+    # program with chains of jumps, label reached both by jump and by fall-through, conditional jump
+    # whose both ways meet and two unreachable parts, writes "abccdd"
+    def write_jumps(self, path):
+        write_program(path, [
+            ("DEFVAR", ("var", "GF@i")),
+            ("MOVE", ("var", "GF@i"), ("int", "0")),
+            ("LABEL", ("label", "loop")),
+            ("JUMPIFEQ", ("label", "first"), ("var", "GF@i"), ("int", "0")),
+            ("JUMPIFEQ", ("label", "second"), ("var", "GF@i"), ("int", "1")),
+            ("JUMPIFEQ", ("label", "chain"), ("var", "GF@i"), ("int", "2")),
+            ("JUMP", ("label", "meet")),
+            ("LABEL", ("label", "first")),
+            ("WRITE", ("string", "a")),
+            ("JUMP", ("label", "next")),
+            ("LABEL", ("label", "second")),
+            ("WRITE", ("string", "b")),
+            ("LABEL", ("label", "both")),        # target of the chain and reached from the WRITE above
+            ("WRITE", ("string", "c")),
+            ("JUMP", ("label", "next")),
+            ("LABEL", ("label", "chain")),
+            ("JUMP", ("label", "chained")),      # leads to the instruction after it
+            ("LABEL", ("label", "chained")),
+            ("JUMP", ("label", "both")),
+            ("WRITE", ("string", "x")),
+            ("LABEL", ("label", "meet")),
+            ("JUMPIFEQ", ("label", "after"), ("var", "GF@i"), ("int", "3")),
+            ("LABEL", ("label", "extra")),       # the way without jump goes through one more label
+            ("LABEL", ("label", "after")),
+            ("WRITE", ("string", "d")),
+            ("LABEL", ("label", "next")),
+            ("ADD", ("var", "GF@i"), ("var", "GF@i"), ("int", "1")),
+            ("JUMPIFNEQ", ("label", "loop"), ("var", "GF@i"), ("int", "5")),
+            ("JUMP", ("label", "end")),
+            ("WRITE", ("string", "y")),
+            ("LABEL", ("label", "unused")),
+            ("WRITE", ("string", "z")),
+            ("LABEL", ("label", "end"))])
+
+    # optimized program writes the same output and counts the same instructions as the original one
+    def test_instruction_count(self):
+        with tempfile.TemporaryDirectory() as temporary:
+            source, stats = os.path.join(temporary, "program.src"), os.path.join(temporary, "stats")
+            self.write_jumps(source)
+            counts = []
+            for engine in engines:
+                for level in levels:
+                    with self.subTest(engine=engine, level=level):
+                        code, output, errors = run(["--source=" + source, "--engine=" + engine,
+                                                    "--stats=" + stats, "--insts"] + level)
+                        self.assertEqual((code, output), (0, "abccdd"), errors)
+                        with open(stats) as stats_file:
+                            counts.append(stats_file.read())
+            self.assertEqual(counts, [counts[0]] * len(counts))
+
+    # unreachable parts are written out with their orders and labels
+    def test_report_dead_code(self):
+        with tempfile.TemporaryDirectory() as temporary:
+            source = os.path.join(temporary, "program.src")
+            self.write_jumps(source)
+            for level in levels[1:]:
+                with self.subTest(level=level):
+                    code, output, errors = run(["--source=" + source, "--report-dead-code"] + level)
+                    self.assertEqual((code, output), (0, "abccdd"), errors)
+                    self.assertEqual(errors, "Unreachable code: 4 of 33 instructions removed\n"
+                                             "  orders 20-20 (1 instruction)\n"
+                                             "  orders 30-32 (3 instructions, labels unused)\n")
+
+            code, output, errors = run(["--source=" + source, "--report-dead-code"])
+            self.assertEqual((code, errors), (10, "--report-dead-code requires -O1 or -O2\n"))
+
+# checks that programs kept by --cache-dir are used only while they match the source and the interpret
+class CacheTests(unittest.TestCase):
+    # program that writes given text
+    def write_text_program(self, path, text):
+        write_program(path, [("WRITE", ("string", text))])
+
+    # runs the program with the cache, checks its output and returns files of the cache
+    def run_cached(self, script, source, cache, expected_output):
+        process = subprocess.run([sys.executable, script, "--source=" + source, "--cache-dir=" + cache],
+                                 stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.assertEqual(process.returncode, 0, process.stderr.decode("utf-8"))
+        self.assertEqual(process.stdout.decode("utf-8"), expected_output)
+        return sorted(glob.glob(os.path.join(cache, "*.ippc")))
+
+    # source changed after it was cached is loaded again and cached under another name
+    def test_edited_source(self):
+        with tempfile.TemporaryDirectory() as temporary:
+            source, cache = os.path.join(temporary, "program.src"), os.path.join(temporary, "cache")
+            self.write_text_program(source, "first")
+            first = self.run_cached(interpret, source, cache, "first")
+            self.assertEqual(self.run_cached(interpret, source, cache, "first"), first)
+            self.write_text_program(source, "second")
+            second = self.run_cached(interpret, source, cache, "second")
+            self.assertEqual(len(second), 2)
+            self.assertEqual(self.run_cached(interpret, source, cache, "second"), second)
+
+    # corrupted or truncated file of the cache is ignored and written again
+    def test_corrupted_cache(self):
+        with tempfile.TemporaryDirectory() as temporary:
+            source, cache = os.path.join(temporary, "program.src"), os.path.join(temporary, "cache")
+            self.write_text_program(source, "text")
+            path = self.run_cached(interpret, source, cache, "text")[0]
+            with open(path, "rb") as cache_file:
+                content = cache_file.read()
+            for corrupted in [b"", content[:len(content) // 2], b"\xff" * 64]:
+                with self.subTest(size=len(corrupted)):
+                    with open(path, "wb") as cache_file:
+                        cache_file.write(corrupted)
+                    self.assertEqual(self.run_cached(interpret, source, cache, "text"), [path])
+                    with open(path, "rb") as cache_file:
+                        self.assertEqual(cache_file.read(), content)
+
+    # file of the cache that belongs to other program or other version of the interpret isn't used
+    def test_stale_cache(self):
+        with tempfile.TemporaryDirectory() as temporary:
+            source, cache = os.path.join(temporary, "program.src"), os.path.join(temporary, "cache")
+            other = os.path.join(temporary, "other.src")
+            self.write_text_program(source, "program")
+            self.write_text_program(other, "other")
+            path = self.run_cached(interpret, source, cache, "program")[0]
+            files = self.run_cached(interpret, other, cache, "other")
+            files.remove(path)
+            os.replace(files[0], path)    # file of the other program under the name of this one
+            self.run_cached(interpret, source, cache, "program")
+
+            # changed interpret doesn't use programs cached by the previous one
+            changed = os.path.join(temporary, "interpret.py")
+            with open(interpret, encoding="utf-8") as original:
+                text = original.read()
+            with open(changed, "w", encoding="utf-8") as copy:
+                copy.write(text + "# changed\n")
+            self.assertEqual(len(self.run_cached(changed, source, cache, "program")), 2)
+
+# checks memory taken by local and temporary frames
+class FrameTests(unittest.TestCase):
+    # program that recurses deep with one variable in every frame, but with many other local names
+    def write_recursion(self, path, names, depth):
+        unused = [("LABEL", ("label", "unused"))]
+        for i in range(0, names):
+            unused.append(("DEFVAR", ("var", "LF@unused" + str(i))))
+        write_program(path, [("JUMP", ("label", "main"))] + unused + [
+            ("RETURN",),
+            ("LABEL", ("label", "down")),
+            ("CREATEFRAME",),
+            ("DEFVAR", ("var", "TF@x")),
+            ("PUSHFRAME",),
+            ("SUB", ("var", "GF@n"), ("var", "GF@n"), ("int", "1")),
+            ("JUMPIFEQ", ("label", "bottom"), ("var", "GF@n"), ("int", "0")),
+            ("CALL", ("label", "down")),
+            ("LABEL", ("label", "bottom")),
+            ("POPFRAME",),
+            ("RETURN",),
+            ("LABEL", ("label", "main")),
+            ("DEFVAR", ("var", "GF@n")),
+            ("MOVE", ("var", "GF@n"), ("int", str(depth))),
+            ("CALL", ("label", "down")),
+            ("WRITE", ("var", "GF@n"))])
+
+    # peak memory of the interpret in kilobytes, measured in fresh process so no other child counts
+    def peak_memory(self, arguments):
+        measure = ("import resource, subprocess, sys\n"
+                   "subprocess.run(sys.argv[1:], stdout=subprocess.DEVNULL, check=True)\n"
+                   "print(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)")
+        process = subprocess.run([sys.executable, "-c", measure, sys.executable, interpret] + arguments,
+                                 stdin=subprocess.DEVNULL, stdout=subprocess.PIPE)
+        self.assertEqual(process.returncode, 0)
+        return int(process.stdout)
+
+    # frames of deep recursion take memory for their own variables, not for all local names of the program
+    @unittest.skipIf(resource == None, "resource module is not available")
+    def test_deep_recursion_memory(self):
+        with tempfile.TemporaryDirectory() as temporary:
+            few, many = os.path.join(temporary, "few.src"), os.path.join(temporary, "many.src")
+            self.write_recursion(few, 0, 20000)
+            self.write_recursion(many, 2000, 20000)
+            for engine in engines:
+                with self.subTest(engine=engine):
+                    code, output, errors = run(["--source=" + many, "--engine=" + engine])
+                    self.assertEqual((code, output), (0, "0"), errors)
+                    growth = self.peak_memory(["--source=" + many, "--engine=" + engine]) - \
+                             self.peak_memory(["--source=" + few, "--engine=" + engine])
+                    self.assertLess(growth, 64 * 1024)
+
+if __name__ == '__main__':
+    unittest.main()